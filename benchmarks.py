@@ -0,0 +1,304 @@
+# ================================ IMPORT BENCHMARKS ================================
+#
+# Development-only timing harness for the trade import paths.
+#
+#   python benchmarks.py                 # synthetic TradingView export
+#   python benchmarks.py export.xlsx     # your own export
+#   python benchmarks.py --rows 200000   # larger synthetic export
+#   python benchmarks.py --suite dates   # date parsing microbenchmarks only
+#   python benchmarks.py --suite importers  # every registered import format
+#   python benchmarks.py --suite archives   # the same CSV plain, gzipped and zipped
+#   python benchmarks.py --suite snapshots  # session save/load at 10k, 1M and 10M trades
+
+import os
+import sys
+import csv
+import gzip
+import shutil
+import zipfile
+import time
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+import openpyxl
+
+from trading_calendar import TradeProcessor, DateParser, DataManager, TradeTable, TRADE_IMPORTERS
+
+
+def synthetic_trades(rows):
+    """(trade_num, entry time, exit time, pnl) for rows // 2 trades spread over ten years"""
+    trade_time = datetime(2015, 1, 5, 9, 30)
+    step = timedelta(days=3650) / max(1, rows // 2)
+    for trade_num in range(1, rows // 2 + 1):
+        pnl = round(((trade_num * 7919) % 2001 - 950) / 10.0, 2)
+        yield trade_num, trade_time, trade_time + step / 2, pnl
+        trade_time += step
+
+
+def build_synthetic_export(path, rows):
+    wb = openpyxl.Workbook(write_only=True)
+    wb.create_sheet("Performance").append(["Net Profit", 0])
+    sheet = wb.create_sheet("List of trades")
+    sheet.append(["Trade #", "Type", "Signal", "Date/Time", "Price USD",
+                  "Contracts", "P&L USD", "P&L %", "Cumulative P&L USD"])
+
+    cumulative = 0.0
+    for trade_num, entry_time, exit_time, pnl in synthetic_trades(rows):
+        cumulative += pnl
+        sheet.append([trade_num, "Entry long", "Long", entry_time, 4321.25, 1, pnl, 0.1, cumulative])
+        sheet.append([trade_num, "Exit long", "Close", exit_time, 4330.5, 1, pnl, 0.1, cumulative])
+
+    wb.save(path)
+    return path
+
+
+def build_synthetic_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Trade #", "Type", "Signal", "Date/Time", "Price USD", "Contracts", "P&L USD"])
+        for trade_num, entry_time, exit_time, pnl in synthetic_trades(rows):
+            writer.writerow([trade_num, "Entry long", "Long", entry_time.strftime('%Y-%m-%d %H:%M'), 4321.25, 1, pnl])
+            writer.writerow([trade_num, "Exit long", "Close", exit_time.strftime('%Y-%m-%d %H:%M'), 4330.5, 1, pnl])
+    return path
+
+
+def build_synthetic_broker_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(["Ticket", "Symbol", "Open Time", "Close Time", "Volume", "Profit"])
+        for trade_num, entry_time, exit_time, pnl in synthetic_trades(rows * 2):
+            writer.writerow([trade_num, "ES", entry_time.strftime('%Y.%m.%d %H:%M:%S'),
+                             exit_time.strftime('%Y.%m.%d %H:%M:%S'), 1, pnl])
+    return path
+
+
+METATRADER_DEAL_HEADER = ["Time", "Deal", "Symbol", "Type", "Direction", "Volume", "Price", "Order",
+                          "Commission", "Swap", "Profit", "Balance", "Comment"]
+
+
+def synthetic_metatrader_deals(rows):
+    """An opening and a closing deal row per synthetic trade, as a MetaTrader report lists them"""
+    for trade_num, entry_time, exit_time, pnl in synthetic_trades(rows):
+        for deal_time, direction, profit in ((entry_time, "in", 0.0), (exit_time, "out", pnl)):
+            yield [deal_time.strftime('%Y.%m.%d %H:%M:%S'), trade_num, "ES", "buy", direction,
+                   "1.00", "4321.25", trade_num, "0.00", "0.00", f"{profit:.2f}", "", ""]
+
+
+def build_synthetic_metatrader_html(path, rows):
+    with open(path, 'w', encoding='utf-16') as f:
+        f.write("<html><head><title>Strategy Tester Report</title></head><body><table>\n")
+        f.write("<tr>" + "".join(f"<td><b>{name}</b></td>" for name in METATRADER_DEAL_HEADER) + "</tr>\n")
+        for cells in synthetic_metatrader_deals(rows):
+            f.write("<tr align=right>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>\n")
+        f.write("</table></body></html>\n")
+    return path
+
+
+def build_synthetic_metatrader_xlsx(path, rows):
+    wb = openpyxl.Workbook(write_only=True)
+    sheet = wb.create_sheet("Sheet1")
+    sheet.append(["Strategy Tester Report"])
+    sheet.append(["Deals"])
+    sheet.append(METATRADER_DEAL_HEADER)
+    for cells in synthetic_metatrader_deals(rows):
+        sheet.append(cells)
+    wb.save(path)
+    return path
+
+
+SAMPLE_BUILDERS = {
+    "TradingView XLSX": ("synthetic.xlsx", build_synthetic_export),
+    "TradingView XLSX (openpyxl)": ("synthetic.xlsx", build_synthetic_export),
+    "TradingView CSV": ("synthetic.csv", build_synthetic_csv),
+    "Broker CSV": ("synthetic_broker.csv", build_synthetic_broker_csv),
+    "MetaTrader HTML": ("synthetic_metatrader.html", build_synthetic_metatrader_html),
+    "MetaTrader XLSX": ("synthetic_metatrader.xlsx", build_synthetic_metatrader_xlsx),
+}
+
+
+def time_reader(label, process, file_path, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = process(file_path)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    trades = len(result['trades'])
+    print(f"  {label:<28} best {best:8.3f}s   {trades / best:12,.0f} trades/s   ({trades} trades)")
+    return result
+
+
+def bench_xlsx_readers(file_path, repeat):
+    print(f"XLSX readers: {os.path.basename(file_path)} ({os.path.getsize(file_path) / 1024 / 1024:.1f} MB)")
+
+    stream_result = time_reader("XML stream reader",
+                                lambda p: TradeProcessor().process_xlsx_stream(p), file_path, repeat)
+    openpyxl_result = time_reader("openpyxl read-only",
+                                  lambda p: TradeProcessor().process_workbook(p), file_path, repeat)
+
+    if stream_result['daily_pnl'] != openpyxl_result['daily_pnl']:
+        print("  WARNING: readers disagree on daily P&L")
+
+
+def bench_importers(temp_dir, rows, repeat):
+    print(f"Importers: {rows} rows per synthetic sample")
+    samples = {}
+    for importer_class in TRADE_IMPORTERS:
+        if importer_class.name not in SAMPLE_BUILDERS:
+            print(f"  {importer_class.name:<28} no synthetic sample")
+            continue
+
+        filename, build = SAMPLE_BUILDERS[importer_class.name]
+        if filename not in samples:
+            samples[filename] = build(os.path.join(temp_dir, filename), rows)
+
+        time_reader(importer_class.name,
+                    lambda p, cls=importer_class: TradeProcessor().process_with_importer(cls, p),
+                    samples[filename], repeat)
+
+
+def bench_archives(temp_dir, rows, repeat):
+    print(f"Archives: {rows} row CSV plain and compressed")
+    csv_path = build_synthetic_csv(os.path.join(temp_dir, "archive_sample.csv"), rows)
+
+    gz_path = csv_path + ".gz"
+    with open(csv_path, 'rb') as src, gzip.open(gz_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+
+    zip_path = os.path.join(temp_dir, "archive_sample.zip")
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("README.txt", "Synthetic export bundle\n")
+        archive.write(csv_path, "exports/archive_sample.csv")
+
+    for label, path in (("plain .csv", csv_path), (".csv.gz", gz_path), (".zip bundle", zip_path)):
+        time_reader(label, lambda p: TradeProcessor().process_file(p), path, repeat)
+
+
+def synthetic_table(count):
+    trade_nums = np.arange(1, count + 1, dtype=np.int64)
+    dates = datetime(2015, 1, 5).toordinal() + (trade_nums * 3650 // max(1, count)).astype(np.int32)
+    pnl = np.round(((trade_nums * 7919) % 2001 - 950) / 10.0, 2)
+    return TradeTable(dates, pnl, trade_nums)
+
+
+def bench_snapshots(temp_dir, sizes, json_limit, repeat):
+    print(f"Session snapshots: binary save/load vs JSON export (JSON up to {json_limit:,} trades)")
+    data_manager = DataManager(temp_dir)
+    stats = {'total_trades': 0, 'net_pnl': 0.0}
+
+    for count in sizes:
+        trades = synthetic_table(count)
+        daily_pnl = trades.daily_pnl()
+        formats = [("snapshot", lambda: data_manager.save_trading_data("bench.xlsx", trades, stats))]
+        if count <= json_limit:
+            json_path = os.path.join(temp_dir, "bench.json")
+            formats.append(("JSON", lambda: data_manager.export_trading_data_json(
+                json_path, "bench.xlsx", trades, daily_pnl, stats)))
+
+        for label, save in formats:
+            save_timings, load_timings = [], []
+            for _ in range(repeat):
+                began = time.perf_counter()
+                path = save()
+                save_timings.append(time.perf_counter() - began)
+
+                began = time.perf_counter()
+                loaded = data_manager.load_trading_data(path, mapped=True)
+                load_timings.append(time.perf_counter() - began)
+                if len(loaded['trades']) != count:
+                    print("  WARNING: loaded trade count differs")
+                blob = loaded.get('blob')
+                del loaded
+                if blob:
+                    size = os.path.getsize(os.path.join(temp_dir, "blobs", blob + ".tcs"))
+                    data_manager.delete_session(os.path.basename(path))
+                else:
+                    size = os.path.getsize(path)
+                    os.remove(path)
+
+            print(f"  {count:>10,} trades {label:<9} save {min(save_timings):8.3f}s   "
+                  f"load {min(load_timings):8.3f}s   {size / 1024 / 1024:9.1f} MB")
+
+
+def legacy_parse_date(value):
+    """Date parsing as _process_trades did it before DateParser"""
+    if isinstance(value, datetime):
+        trade_date = value.date()
+    else:
+        try:
+            trade_date = datetime.strptime(str(value).split()[0], '%Y-%m-%d').date()
+        except (ValueError, TypeError):
+            return None
+    if trade_date > datetime.now().date() or trade_date.year < 2000:
+        return None
+    return trade_date
+
+
+def bench_date_parsing(count, repeat):
+    print(f"Date parsing: {count} values per layout")
+    start = datetime(2018, 1, 2, 9, 30)
+    stamps = [start + timedelta(minutes=37 * i) for i in range(count)]
+    layouts = [
+        ("ISO strings", [t.strftime('%Y-%m-%d %H:%M:%S') for t in stamps]),
+        ("US slash strings", [t.strftime('%m/%d/%Y %H:%M') for t in stamps]),
+        ("datetime objects", stamps),
+    ]
+
+    for label, values in layouts:
+        def run_legacy():
+            return [legacy_parse_date(v) for v in values]
+
+        def run_parser():
+            parser = DateParser(values[:DateParser.SAMPLE_SIZE])
+            return [parser.parse(v) for v in values]
+
+        for name, run in (("legacy", run_legacy), ("DateParser", run_parser)):
+            timings = []
+            for _ in range(repeat):
+                began = time.perf_counter()
+                parsed = run()
+                timings.append(time.perf_counter() - began)
+            best = min(timings)
+            valid = sum(1 for d in parsed if d is not None)
+            print(f"  {label:<18} {name:<11} best {best:8.3f}s   {count / best:12,.0f} values/s   ({valid} parsed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Strategy Analyzer import benchmarks")
+    parser.add_argument("file", nargs="?", help="TradingView export to benchmark")
+    parser.add_argument("--rows", type=int, default=100000, help="rows in the synthetic export")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per reader")
+    parser.add_argument("--suite", choices=["all", "xlsx", "dates", "importers", "archives", "snapshots"],
+                        default="all", help="benchmarks to run")
+    parser.add_argument("--snapshot-sizes", type=int, nargs="+", default=[10000, 1000000, 10000000],
+                        help="trade counts for the snapshot benchmark")
+    parser.add_argument("--json-limit", type=int, default=1000000,
+                        help="largest trade count to also time as a JSON export")
+    args = parser.parse_args()
+
+    if args.suite in ("all", "dates"):
+        bench_date_parsing(args.rows, args.repeat)
+    if args.suite == "dates":
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.suite in ("all", "xlsx"):
+            file_path = args.file
+            if not file_path:
+                print(f"Building synthetic export with {args.rows} rows...")
+                file_path = build_synthetic_export(os.path.join(temp_dir, "synthetic.xlsx"), args.rows)
+            bench_xlsx_readers(file_path, args.repeat)
+        if args.suite in ("all", "importers"):
+            bench_importers(temp_dir, args.rows, args.repeat)
+        if args.suite in ("all", "archives"):
+            bench_archives(temp_dir, args.rows, args.repeat)
+        if args.suite in ("all", "snapshots"):
+            bench_snapshots(temp_dir, args.snapshot_sizes, args.json_limit, args.repeat)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
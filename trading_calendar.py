@@ -5,18 +5,37 @@ from tkinter import ttk, filedialog, messagebox
 import os
 import sys
 import json
+import io
 import shutil
 import threading
+import multiprocessing
+import queue
 import time
 import tempfile
-from datetime import datetime, timedelta
+import contextlib
+import hashlib
+import pickle
+import sqlite3
+import struct
+import tracemalloc
+from datetime import datetime, timedelta, date
 from collections import defaultdict
+from itertools import chain, islice
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, CancelledError, wait, FIRST_COMPLETED
 import calendar
+import re
+import csv
+import codecs
+import mmap
+import gzip
+import zipfile
+import xml.etree.ElementTree as ET
+from html.parser import HTMLParser
 
 # ================================ DEPENDENCY MANAGEMENT ===============================
 
 def check_dependencies():
-    required_packages = ['openpyxl', 'requests']
+    required_packages = ['openpyxl', 'requests', 'numpy']
     missing_packages = []
     
     for package in required_packages:
@@ -45,6 +64,7 @@ if not check_dependencies():
 
 import openpyxl
 import requests
+import numpy as np
 
 # ================================ CONFIGURATION ================================
 
@@ -67,12 +87,51 @@ DEFAULT_CONFIG = {
         "datetime": "Date/Time",
         "pnl": "P&L USD",
         "trade_num": "Trade #",
-        "type": "Type"
+        "type": "Type",
+        "cumulative_pnl": "Cumulative P&L USD"
+    },
+    "broker_csv_columns": {
+        "datetime": ["Close Time", "Close Date", "Exit Time", "Exit Date", "Date/Time", "Date"],
+        "pnl": ["Realized P&L", "Realized P/L", "Realized PnL", "Net P&L", "Net Profit", "Profit"],
+        "trade_num": ["Trade ID", "Ticket", "Position ID", "Deal"]
+    },
+    "metatrader_columns": {
+        "datetime": ["Time", "Close Time"],
+        "pnl": ["Profit"],
+        "trade_num": ["Deal", "Position", "Ticket", "Order"],
+        "commission": ["Commission"],
+        "swap": ["Swap"],
+        "direction": ["Direction"],
+        "type": ["Type"]
     },
     "sheet_names": [
         "List of trades",
         "list of trades"
     ],
+    "import": {
+        "csv_buffer_size": 1024 * 1024,
+        "decompress_queue_chunks": 8,
+        "archive_spool_bytes": 64 * 1024 * 1024,
+        "csv_mmap_threshold": 256 * 1024 * 1024,
+        "fast_xlsx_reader": True,
+        "cache_max_bytes": 256 * 1024 * 1024,
+        "max_workers": None,
+        "isolated_process": True,
+        "isolated_process_min_bytes": 1024 * 1024,
+        "profile_memory": False,
+        "preview_min_bytes": 20 * 1024 * 1024,
+        "checkpoint_min_bytes": 50 * 1024 * 1024,
+        "checkpoint_interval_s": 15
+    },
+    "quality": {
+        "outlier_z": 6.0,
+        "examples": 3
+    },
+    "retention": {
+        "budget_bytes": 2 * 1024 * 1024 * 1024,
+        "max_age_days": None,
+        "keep_last_per_source": 5
+    },
     "ui": {
         "window_width": 1200,
         "window_height": 800,
@@ -86,288 +145,3292 @@ DEFAULT_CONFIG = {
 
 class DataManager:
     
-    def __init__(self, data_dir):
+    CACHE_VERSION = 2
+    
+    def __init__(self, data_dir, cache_max_bytes=256 * 1024 * 1024):
         self.data_dir = data_dir
+        self.cache_dir = os.path.join(data_dir, 'cache')
+        self.cache_max_bytes = cache_max_bytes
         self.ensure_data_directory()
+        self.trade_store = TradeStore(os.path.join(data_dir, 'trades.sqlite'))
+        self._background_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='data-writer')
+        self._index_lock = threading.RLock()
+        self._snapshot_maps = []
     
     def ensure_data_directory(self):
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir, exist_ok=True)
     
-    def save_trading_data(self, filename, trades, daily_pnl, stats):
+    def fingerprint_file(self, file_path):
+        """Size, mtime and content hash; the hash is reused while size and mtime are unchanged"""
+        stat = os.stat(file_path)
+        key = os.path.abspath(file_path)
+        index = self._load_fingerprint_index()
+        
+        entry = index.get(key)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return entry
+        
+        hasher = hashlib.blake2b(digest_size=20)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                hasher.update(chunk)
+        
+        entry = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'hash': hasher.hexdigest()
+        }
+        index.pop(key, None)
+        index[key] = entry
+        while len(index) > 1000:
+            index.pop(next(iter(index)))
+        self._save_fingerprint_index(index)
+        
+        return entry
+    
+    def _fingerprint_index_path(self):
+        return os.path.join(self.cache_dir, 'fingerprints.json')
+    
+    def _load_fingerprint_index(self):
+        try:
+            with open(self._fingerprint_index_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+    
+    def _save_fingerprint_index(self, index):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._write_atomic(self._fingerprint_index_path(), json.dumps(index).encode('utf-8'))
+        except (IOError, OSError) as e:
+            print(f"Error saving fingerprint index: {e}")
+    
+    def _write_atomic(self, path, payload):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(temp_path, path)
+    
+    def _cache_path(self, fingerprint):
+        return os.path.join(self.cache_dir, f"{fingerprint['hash']}_v{self.CACHE_VERSION}.pickle")
+    
+    def load_cached_result(self, fingerprint):
+        cache_path = self._cache_path(fingerprint)
+        try:
+            with open(cache_path, 'rb') as f:
+                result = pickle.load(f)
+            os.utime(cache_path)
+            return result
+        except FileNotFoundError:
+            return None
+        except (IOError, OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            print(f"Discarding unreadable cache entry: {e}")
+            try:
+                os.remove(cache_path)
+            except OSError:
+                pass
+            return None
+    
+    def store_cached_result(self, fingerprint, result):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+            self._write_atomic(self._cache_path(fingerprint), payload)
+            self._evict_cache_entries()
+        except (IOError, OSError, pickle.PicklingError) as e:
+            print(f"Error writing import cache: {e}")
+    
+    def _evict_cache_entries(self):
+        """Drop least recently used entries until the cache fits its size budget"""
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.pickle'):
+                filepath = os.path.join(self.cache_dir, filename)
+                stat = os.stat(filepath)
+                entries.append((stat.st_mtime, stat.st_size, filepath))
+        
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, filepath in sorted(entries):
+            if total_size <= self.cache_max_bytes:
+                break
+            os.remove(filepath)
+            total_size -= size
+    
+    def clear_import_cache(self):
+        if os.path.exists(self.cache_dir):
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def dataset_key(self, file_path):
+        """Stable name for a strategy's exports: the file stem without TradingView's date suffix"""
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        stem = re.sub(r'[_ -]\d{4}-\d{2}-\d{2}.*$', '', stem)
+        return re.sub(r'[^A-Za-z0-9._-]+', '_', stem).strip('_').lower() or 'dataset'
+    
+    def _dataset_dir(self, file_path):
+        return os.path.join(self.data_dir, 'datasets', self.dataset_key(file_path))
+    
+    def find_dataset(self, file_path):
+        """Manifest of the stored dataset matching this export, None if there is none"""
+        try:
+            with open(os.path.join(self._dataset_dir(file_path), 'manifest.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+    
+    def load_dataset(self, file_path):
+        manifest = self.find_dataset(file_path)
+        if manifest is None:
+            return None
+        
+        dataset_dir = self._dataset_dir(file_path)
+        segments = []
+        for segment in manifest['segments']:
+            with open(os.path.join(dataset_dir, segment), 'rb') as f:
+                segments.append(pickle.load(f))
+        
+        return {
+            'trades': TradeTable.concatenate(segments),
+            'daily_pnl': manifest['daily_pnl'],
+            'stats': manifest['stats']
+        }
+    
+    def store_dataset(self, file_path, result):
+        """Replace the stored dataset with a single base segment"""
+        dataset_dir = self._dataset_dir(file_path)
+        try:
+            if os.path.exists(dataset_dir):
+                shutil.rmtree(dataset_dir)
+            os.makedirs(dataset_dir, exist_ok=True)
+            self._write_dataset_segment(dataset_dir, [], file_path, result['trades'], result,
+                                        TradeDedupeIndex.from_table(result['trades']))
+        except (IOError, OSError, pickle.PicklingError) as e:
+            print(f"Error storing dataset: {e}")
+    
+    def append_dataset_segment(self, file_path, new_trades, result, dedupe_index=None):
+        """Persist only the new trades, plus the folded aggregates and the updated dedupe index"""
+        manifest = self.find_dataset(file_path)
+        if manifest is None:
+            return self.store_dataset(file_path, result)
+        
+        if dedupe_index is None:
+            dedupe_index = TradeDedupeIndex.from_table(result['trades'])
+        
+        try:
+            self._write_dataset_segment(self._dataset_dir(file_path), manifest['segments'],
+                                        file_path, new_trades, result, dedupe_index)
+        except (IOError, OSError, pickle.PicklingError) as e:
+            print(f"Error appending to dataset: {e}")
+    
+    def load_dedupe_index(self, file_path):
+        """Dedupe index of the stored dataset, rebuilt from its trades if missing or unreadable"""
+        index_path = os.path.join(self._dataset_dir(file_path), 'dedupe.idx')
+        try:
+            with open(index_path, 'rb') as f:
+                return TradeDedupeIndex.from_bytes(f.read())
+        except (IOError, OSError, ValueError, struct.error):
+            dataset = self.load_dataset(file_path)
+            return TradeDedupeIndex.from_table(dataset['trades']) if dataset else TradeDedupeIndex()
+    
+    def _write_dataset_segment(self, dataset_dir, segments, file_path, trades, result, dedupe_index):
+        segment = f"segment_{len(segments):06d}.pickle"
+        self._write_atomic(os.path.join(dataset_dir, segment),
+                           pickle.dumps(trades, protocol=pickle.HIGHEST_PROTOCOL))
+        self._write_atomic(os.path.join(dataset_dir, 'dedupe.idx'), dedupe_index.to_bytes())
+        
+        all_trade_nums = result['trades'].trade_nums
+        manifest = {
+            'source_filename': os.path.basename(file_path),
+            'updated': datetime.now().isoformat(),
+            'segments': segments + [segment],
+            'total_trades': len(result['trades']),
+            'max_trade_num': int(all_trade_nums.max()) if len(all_trade_nums) else None,
+            'daily_pnl': dict(result['daily_pnl']),
+            'stats': result['stats']
+        }
+        self._write_atomic(os.path.join(dataset_dir, 'manifest.json'), json.dumps(manifest).encode('utf-8'))
+        print(f"Dataset updated: {os.path.basename(dataset_dir)} (+{len(trades)} trades)")
+    
+    def save_import_profile(self, report):
+        try:
+            profiles_dir = os.path.join(self.data_dir, 'profiles')
+            os.makedirs(profiles_dir, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            base_name = os.path.splitext(report['file'] or 'import')[0]
+            profile_file = os.path.join(profiles_dir, f"{base_name}_{timestamp}_profile.json")
+            with open(profile_file, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            return profile_file
+        except (IOError, OSError) as e:
+            print(f"Error saving import profile: {e}")
+            return None
+    
+    def clear_profiles(self):
+        profiles_dir = os.path.join(self.data_dir, 'profiles')
+        if os.path.exists(profiles_dir):
+            shutil.rmtree(profiles_dir, ignore_errors=True)
+    
+    def checkpoint_path(self, fingerprint):
+        """Where a resumable import of the fingerprinted file keeps its checkpoint"""
+        return os.path.join(self.data_dir, 'checkpoints', f"{fingerprint['hash']}.ckpt")
+    
+    def clear_checkpoints(self):
+        checkpoints_dir = os.path.join(self.data_dir, 'checkpoints')
+        if os.path.exists(checkpoints_dir):
+            shutil.rmtree(checkpoints_dir, ignore_errors=True)
+    
+    def store_trades(self, file_path, trades, new_trades=0):
+        """Queue trades for the SQLite trade store under the export's dataset key; the future gives the stored digest
+        
+        With new_trades, only the last that many are written when the store already holds the ones before them."""
+        return self._background_writer.submit(self._write_trade_store, self.dataset_key(file_path),
+                                              os.path.basename(file_path), trades, new_trades)
+    
+    def _write_trade_store(self, strategy, source_filename, trades, new_trades):
+        digest = trades.digest()
+        try:
+            stored = self.trade_store.digest(strategy)
+            if stored == digest:
+                return digest
+            base_count = len(trades) - new_trades
+            if new_trades and stored == trades[:base_count].digest():
+                self.trade_store.append_trades(strategy, source_filename, trades[base_count:], digest)
+            else:
+                self.trade_store.replace_trades(strategy, source_filename, trades, digest)
+        except sqlite3.Error as e:
+            print(f"Error writing trade store: {e}")
+            return None
+        return digest
+    
+    def clear_trade_store(self):
+        self._background_writer.submit(self._remove_trade_store).result()
+    
+    def _remove_trade_store(self):
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(self.trade_store.path + suffix)
+            except OSError:
+                pass
+        self.trade_store = TradeStore(self.trade_store.path)
+    
+    def clear_datasets(self):
+        datasets_dir = os.path.join(self.data_dir, 'datasets')
+        if os.path.exists(datasets_dir):
+            shutil.rmtree(datasets_dir, ignore_errors=True)
+    
+    SAVED_DATA_EXTENSIONS = ('.session', '.tcs', '.json')
+    SESSION_INDEX_VERSION = 1
+    INDEX_FILES = ('sessions.json', 'session.json')
+    
+    def _blob_path(self, blob):
+        return os.path.join(self.data_dir, 'blobs', f"{blob}{SessionSnapshot.EXTENSION}")
+    
+    def save_trading_data(self, filename, trades, stats):
+        """Save the session as a small reference to a content-addressed snapshot blob shared by identical datasets"""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             base_name = os.path.splitext(os.path.basename(filename))[0]
-            save_file = os.path.join(self.data_dir, f"{base_name}_{timestamp}.json")
+            save_file = os.path.join(self.data_dir, f"{base_name}_{timestamp}.session")
             
-            serializable_trades = []
-            for trade in trades:
-                trade_data = trade.copy()
-                if 'date' in trade_data:
-                    trade_data['date'] = trade_data['date'].isoformat()
-                serializable_trades.append(trade_data)
+            try:
+                fingerprint = self.fingerprint_file(filename)['hash']
+            except (IOError, OSError):
+                fingerprint = None
             
-            data = {
+            # Daily P&L is left out of the blob because it is rebuilt from the trades on load
+            payload = SessionSnapshot.to_bytes(trades, {'stats': stats, 'total_trades': len(trades)})
+            blob = hashlib.blake2b(payload, digest_size=20).hexdigest()
+            reference = {
+                'blob': blob,
                 'timestamp': timestamp,
                 'original_filename': os.path.basename(filename),
-                'trades': serializable_trades,
+                'source_file': os.path.abspath(filename),
+                'fingerprint': fingerprint
+            }
+            
+            with self._index_lock:
+                blob_path = self._blob_path(blob)
+                if not os.path.exists(blob_path):
+                    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                    self._write_atomic(blob_path, payload)
+                self._write_atomic(save_file, json.dumps(reference).encode('utf-8'))
+                self._index_session(save_file, trades, reference)
+            
+            print(f"Trading data saved: {os.path.basename(save_file)}")
+            return save_file
+            
+        except (IOError, OSError, TypeError, ValueError) as e:
+            print(f"Error saving data: {e}")
+            return None
+    
+    def load_trading_data(self, save_file, mapped=False):
+        """Saved session as a result dict; reads session references, standalone snapshots and the older JSON saves
+        
+        mapped leaves the trade columns over a map of the snapshot instead of copying them, for sessions kept on screen;
+        release_snapshot_maps closes the map once they are no longer used."""
+        try:
+            if save_file.endswith('.session'):
+                with open(save_file, 'r', encoding='utf-8') as f:
+                    reference = json.load(f)
+                trades, data = self._load_snapshot(self._blob_path(reference['blob']), mapped)
+                data.update(reference)
+            elif save_file.endswith('.json'):
+                with open(save_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                trades = TradeTable.from_records(
+                    dict(trade, date=date.fromisoformat(trade['date'])) for trade in data['trades'])
+            else:
+                trades, data = self._load_snapshot(save_file, mapped)
+        except (IOError, OSError, ValueError, KeyError, TypeError, struct.error) as e:
+            print(f"Error loading saved data: {e}")
+            return None
+        
+        return {
+            'trades': trades,
+            'daily_pnl': trades.daily_pnl(),
+            'stats': data['stats'],
+            'original_filename': data.get('original_filename'),
+            'source_file': data.get('source_file'),
+            'fingerprint': data.get('fingerprint'),
+            'blob': data.get('blob'),
+            'timestamp': data.get('timestamp')
+        }
+    
+    def export_trading_data_json(self, export_file, filename, trades, daily_pnl, stats):
+        """Readable JSON copy of a session, for use outside the app"""
+        try:
+            data = {
+                'timestamp': datetime.now().strftime("%Y%m%d_%H%M%S"),
+                'original_filename': os.path.basename(filename) if filename else None,
+                'trades': [dict(trade, date=trade['date'].isoformat()) for trade in trades],
                 'daily_pnl': dict(daily_pnl),
                 'stats': stats,
                 'total_trades': len(trades)
             }
             
-            with open(save_file, 'w', encoding='utf-8') as f:
+            with open(export_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2)
             
-            print(f"Trading data saved: {os.path.basename(save_file)}")
-            return save_file
+            print(f"Trading data exported: {os.path.basename(export_file)}")
+            return export_file
             
-        except (IOError, OSError, json.JSONEncodeError) as e:
-            print(f"Error saving data: {e}")
+        except (IOError, OSError, TypeError, ValueError) as e:
+            print(f"Error exporting data: {e}")
             return None
     
     def get_data_history(self):
+        """Saved sessions, newest first, described from the session index without opening any session file"""
+        sessions = self._load_session_index()
+        if sessions is None:
+            sessions = self.rebuild_session_index()
+        
+        history = [dict(entry, path=os.path.join(self.data_dir, filename)) for filename, entry in sessions.items()]
+        history.sort(key=lambda x: x['modified'], reverse=True)
+        return history
+    
+    def find_session(self, file_path, trades):
+        """Newest saved session of this exact file holding the same number of trades, None if there is none"""
         try:
-            if not os.path.exists(self.data_dir):
-                return []
-            
-            files = []
-            for filename in os.listdir(self.data_dir):
-                if filename.endswith('.json'):
-                    filepath = os.path.join(self.data_dir, filename)
-                    files.append({
-                        'filename': filename,
-                        'path': filepath,
-                        'modified': os.path.getmtime(filepath)
-                    })
-            
-            files.sort(key=lambda x: x['modified'], reverse=True)
-            return files
-            
-        except (IOError, OSError) as e:
-            print(f"Error getting data history: {e}")
-            return []
-
-# ================================ TRADE PROCESSING ================================
-
-class TradeProcessor:
+            fingerprint = self.fingerprint_file(file_path)['hash']
+        except (IOError, OSError):
+            return None
+        
+        for entry in self.get_data_history():
+            if (entry.get('fingerprint') == fingerprint and entry.get('total_trades') == len(trades)
+                    and os.path.exists(entry['path'])):
+                return entry['path']
+        return None
     
-    def __init__(self, config=None):
-        self.config = config or DEFAULT_CONFIG
-        self.trades = []
-        self.daily_pnl = defaultdict(float)
-        self.stats = {}
+    def _session_index_path(self):
+        return os.path.join(self.data_dir, 'sessions.json')
     
-    def process_file(self, file_path, progress_callback=None):
+    def _load_session_index(self):
+        try:
+            with open(self._session_index_path(), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') == self.SESSION_INDEX_VERSION:
+                return index['sessions']
+        except (IOError, OSError, ValueError, KeyError, AttributeError):
+            pass
+        return None
+    
+    def _save_session_index(self, sessions):
         try:
-            file_size = os.path.getsize(file_path)
-            is_small_file = file_size < 1024 * 1024
+            payload = json.dumps({'version': self.SESSION_INDEX_VERSION, 'sessions': sessions})
+            self._write_atomic(self._session_index_path(), payload.encode('utf-8'))
+        except (IOError, OSError, TypeError) as e:
+            print(f"Error saving session index: {e}")
+    
+    def _session_entry(self, save_file, trades, metadata):
+        """Index entry; size is the bytes the session keeps alive, its blob's size when it references one"""
+        pnl = trades.pnl
+        blob = metadata.get('blob')
+        return {
+            'filename': os.path.basename(save_file),
+            'source_file': metadata.get('source_file'),
+            'original_filename': metadata.get('original_filename'),
+            'fingerprint': metadata.get('fingerprint'),
+            'blob': blob,
+            'modified': os.path.getmtime(save_file),
+            'size': os.path.getsize(self._blob_path(blob) if blob else save_file),
+            'total_trades': len(trades),
+            'first_date': date.fromordinal(int(trades.dates.min())).isoformat() if len(trades) else None,
+            'last_date': date.fromordinal(int(trades.dates.max())).isoformat() if len(trades) else None,
+            'net_pnl': float(pnl.sum()),
+            'winning_trades': int((pnl > 0).sum()),
+            'losing_trades': int((pnl < 0).sum())
+        }
+    
+    def _index_session(self, save_file, trades, metadata):
+        with self._index_lock:
+            sessions = self._load_session_index()
+            if sessions is None:
+                sessions = self.rebuild_session_index()
+            sessions[os.path.basename(save_file)] = self._session_entry(save_file, trades, metadata)
+            self._save_session_index(sessions)
+    
+    def rebuild_session_index(self):
+        """Recreate the session index by reading every saved session; only needed when the index is missing"""
+        sessions = {}
+        with self._index_lock:
+            try:
+                filenames = [f for f in os.listdir(self.data_dir)
+                             if f.endswith(self.SAVED_DATA_EXTENSIONS) and f not in self.INDEX_FILES]
+            except (IOError, OSError) as e:
+                print(f"Error getting data history: {e}")
+                return sessions
             
-            if progress_callback and not is_small_file:
-                progress_callback("Opening Excel file...")
+            for filename in filenames:
+                save_file = os.path.join(self.data_dir, filename)
+                session = self.load_trading_data(save_file)
+                if session is not None:
+                    sessions[filename] = self._session_entry(save_file, session['trades'], session)
+            
+            self._save_session_index(sessions)
+        return sessions
+    
+    def _load_snapshot(self, path, mapped):
+        if not mapped:
+            return SessionSnapshot.load(path)
+        trades, metadata, mapping = SessionSnapshot.map(path)
+        with self._index_lock:
+            self._snapshot_maps.append(mapping)
+        return trades, metadata
+    
+    def release_snapshot_maps(self):
+        """Close the snapshot maps no trade table reads from any more; returns how many are still in use"""
+        with self._index_lock:
+            in_use = []
+            for mapping in self._snapshot_maps:
+                try:
+                    mapping.close()
+                except BufferError:
+                    in_use.append(mapping)
+            self._snapshot_maps = in_use
+        return len(in_use)
+    
+    def delete_session(self, filename):
+        """Remove a saved session and its index entry, and its blob once no other session shares it"""
+        with self._index_lock:
+            # An open map keeps the file from being deleted on Windows
+            self.release_snapshot_maps()
+            try:
+                os.remove(os.path.join(self.data_dir, filename))
+            except FileNotFoundError:
+                pass
+            except (IOError, OSError) as e:
+                print(f"Error deleting session: {e}")
+                return False
             
-            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+            sessions = self._load_session_index()
+            if sessions is None:
+                sessions = self.rebuild_session_index()
+            sessions.pop(filename, None)
+            self._save_session_index(sessions)
+            self._remove_unreferenced_blobs(sessions)
+        return True
+    
+    def _remove_unreferenced_blobs(self, sessions):
+        """Delete blobs no indexed session points at; returns the bytes freed"""
+        blobs_dir = os.path.join(self.data_dir, 'blobs')
+        referenced = {f"{entry['blob']}{SessionSnapshot.EXTENSION}" for entry in sessions.values() if entry.get('blob')}
+        freed = 0
+        try:
+            filenames = os.listdir(blobs_dir)
+        except OSError:
+            return freed
+        
+        for filename in filenames:
+            if filename in referenced:
+                continue
+            blob_path = os.path.join(blobs_dir, filename)
+            try:
+                size = os.path.getsize(blob_path)
+                os.remove(blob_path)
+                freed += size
+            except OSError:
+                continue
+        return freed
+    
+    def _derived_files(self):
+        """Import profiles, import cache entries and stored datasets as (path, size, mtime), each group oldest first;
+        the groups are listed in the order they give way to the storage budget"""
+        groups = []
+        for name, suffix in (('profiles', '_profile.json'), ('cache', '.pickle'), ('datasets', None)):
+            root = os.path.join(self.data_dir, name)
+            items = []
+            try:
+                filenames = os.listdir(root)
+            except OSError:
+                filenames = []
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                try:
+                    if suffix is None:
+                        if not os.path.isdir(path):
+                            continue
+                        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+                    elif filename.endswith(suffix):
+                        size = os.path.getsize(path)
+                    else:
+                        continue
+                    items.append((path, size, os.path.getmtime(path)))
+                except OSError:
+                    continue
+            items.sort(key=lambda item: item[2])
+            groups.append(items)
+        return groups
+    
+    def _remove_derived_file(self, path):
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            return True
+        except OSError as e:
+            print(f"Error removing {os.path.basename(path)}: {e}")
+            return False
+    
+    def compact_storage(self, retention, protected=()):
+        """Apply the retention policy to saved sessions and import profiles, then drop blobs nothing references;
+        the disk budget also counts the import cache and the stored datasets, which give way before any session"""
+        with self._index_lock:
+            self.release_snapshot_maps()
+            sessions = self._load_session_index()
+            if sessions is None:
+                sessions = self.rebuild_session_index()
             
-            if progress_callback and not is_small_file:
-                progress_callback("Scanning for trading data sheets...")
+            protected = {os.path.basename(p) for p in protected if p}
+            protected_dataset = None
+            try:
+                with open(self._session_state_path(), 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if state.get('dataset'):
+                    protected_dataset = self._dataset_dir(state['dataset'])
+                else:
+                    protected.add(state['snapshot'])
+            except (IOError, OSError, ValueError, KeyError, TypeError, AttributeError):
+                pass
             
-            sheet = self._find_trades_sheet(wb, progress_callback if not is_small_file else None)
-            if not sheet:
-                raise ValueError("Could not find trading data sheet")
+            keep_last = retention.get('keep_last_per_source')
+            max_age_days = retention.get('max_age_days')
+            budget_bytes = retention.get('budget_bytes')
             
-            if progress_callback and not is_small_file:
-                progress_callback("Analyzing column headers...")
+            newest_first = sorted(sessions.values(), key=lambda e: e['modified'], reverse=True)
+            # Without a session state the startup restore falls back to the newest session, maybe reading it right now
+            if newest_first:
+                protected.add(newest_first[0]['filename'])
+            expired = set()
+            per_source = defaultdict(int)
+            for entry in newest_first:
+                source = entry.get('source_file') or entry.get('original_filename') or entry['filename']
+                per_source[source] += 1
+                if entry['filename'] in protected:
+                    continue
+                if keep_last is not None and per_source[source] > keep_last:
+                    expired.add(entry['filename'])
+                elif (max_age_days is not None and entry.get('blob')
+                      and time.time() - entry['modified'] > max_age_days * 86400):
+                    # Saves from before the session index never age out; an upgrade must not quietly drop them
+                    expired.add(entry['filename'])
             
-            headers = self._analyze_headers(sheet, progress_callback if not is_small_file else None)
+            # Profiles follow the session rules, grouped by the file they profiled
+            profiles, cache_entries, datasets = self._derived_files()
+            removed = []
+            per_source = defaultdict(int)
+            for path, size, modified in reversed(profiles):
+                source = re.sub(r'_\d{8}_\d{6}_profile\.json$', '', os.path.basename(path))
+                per_source[source] += 1
+                if ((keep_last is not None and per_source[source] > keep_last)
+                        or (max_age_days is not None and time.time() - modified > max_age_days * 86400)):
+                    removed.append((path, size))
+            removed_paths = {path for path, _ in removed}
+            profiles = [item for item in profiles if item[0] not in removed_paths]
+            datasets = [item for item in datasets if item[0] != protected_dataset]
             
-            self._process_trades(sheet, headers, progress_callback if not is_small_file else None)
+            if budget_bytes is not None:
+                blob_refs = defaultdict(int)
+                used = 0
+                for entry in newest_first:
+                    if entry['filename'] in expired:
+                        continue
+                    if entry.get('blob'):
+                        blob_refs[entry['blob']] += 1
+                        used += entry['size'] if blob_refs[entry['blob']] == 1 else 0
+                    else:
+                        used += entry['size']
+                
+                # Profiles, then cached imports, then datasets go before any session, oldest first within each
+                derived = profiles + cache_entries + datasets
+                used += sum(size for _, size, _ in derived)
+                for path, size, _ in derived:
+                    if used <= budget_bytes:
+                        break
+                    removed.append((path, size))
+                    used -= size
+                
+                # Oldest sessions go first; a shared blob only frees space with its last reference
+                for entry in reversed(newest_first):
+                    if used <= budget_bytes:
+                        break
+                    if entry['filename'] in expired or entry['filename'] in protected:
+                        continue
+                    expired.add(entry['filename'])
+                    if entry.get('blob'):
+                        blob_refs[entry['blob']] -= 1
+                        used -= entry['size'] if blob_refs[entry['blob']] == 0 else 0
+                    else:
+                        used -= entry['size']
             
-            self.calculate_stats()
+            removed = [(path, size) for path, size in removed if self._remove_derived_file(path)]
+            freed = sum(size for _, size in removed)
             
-            wb.close()
+            for filename in expired:
+                try:
+                    os.remove(os.path.join(self.data_dir, filename))
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Error removing expired session: {e}")
+                    continue
+                sessions.pop(filename, None)
             
+            if expired:
+                self._save_session_index(sessions)
+            freed += self._remove_unreferenced_blobs(sessions)
+        
+        if expired or freed:
+            print(f"Storage compaction: removed {len(expired)} sessions and {len(removed)} profile, cache or dataset "
+                  f"entries, freed {freed / 1024 / 1024:.1f} MB")
+        return {'sessions_removed': len(expired), 'files_removed': len(removed), 'bytes_freed': freed}
+    
+    def compact_storage_in_background(self, retention, protected=()):
+        return self._background_writer.submit(self.compact_storage, retention, protected)
+    
+    def clear_blobs(self):
+        self.release_snapshot_maps()
+        blobs_dir = os.path.join(self.data_dir, 'blobs')
+        if os.path.exists(blobs_dir):
+            shutil.rmtree(blobs_dir, ignore_errors=True)
+    
+    def clear_session_index(self):
+        try:
+            os.remove(self._session_index_path())
+        except OSError:
+            pass
+    
+    def _session_state_path(self):
+        return os.path.join(self.data_dir, 'session.json')
+    
+    def save_session_state(self, state):
+        """Remember which snapshot is open, the month on screen and the excluded days"""
+        try:
+            self._write_atomic(self._session_state_path(), json.dumps(state).encode('utf-8'))
+        except (IOError, OSError, TypeError) as e:
+            print(f"Error saving session state: {e}")
+    
+    def latest_session(self):
+        """(snapshot path, session state) to restore at startup, None if nothing has been saved
+        
+        A session over a stored dataset has no snapshot; its state names the dataset's source file instead."""
+        try:
+            with open(self._session_state_path(), 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('dataset'):
+                if self.find_dataset(state['dataset']) is not None:
+                    return None, state
+            else:
+                snapshot = os.path.join(self.data_dir, state['snapshot'])
+                if os.path.exists(snapshot):
+                    return snapshot, state
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            pass
+        
+        history = self.get_data_history()
+        return (history[0]['path'], {}) if history else None
+    
+    def clear_session_state(self):
+        try:
+            os.remove(self._session_state_path())
+        except OSError:
+            pass
+
+# ================================ TRADE TABLE ================================
+
+class TradeTable:
+    """Columnar trade storage: date ordinals, P&L and trade numbers in contiguous arrays"""
+    
+    MISSING_TRADE_NUM = -1
+    
+    def __init__(self, dates=None, pnl=None, trade_nums=None):
+        self.dates = np.asarray(dates if dates is not None else [], dtype=np.int32)
+        self.pnl = np.asarray(pnl if pnl is not None else [], dtype=np.float64)
+        if trade_nums is None:
+            trade_nums = np.full(len(self.dates), self.MISSING_TRADE_NUM, dtype=np.int64)
+        self.trade_nums = np.asarray(trade_nums, dtype=np.int64)
+    
+    @classmethod
+    def from_records(cls, trades):
+        builder = TradeTableBuilder()
+        for trade in trades:
+            builder.append(trade['date'], trade['pnl'], trade.get('trade_num'))
+        return builder.build()
+    
+    @classmethod
+    def concatenate(cls, tables):
+        tables = list(tables)
+        if not tables:
+            return cls()
+        return cls(np.concatenate([t.dates for t in tables]),
+                   np.concatenate([t.pnl for t in tables]),
+                   np.concatenate([t.trade_nums for t in tables]))
+    
+    def __len__(self):
+        return len(self.dates)
+    
+    def __iter__(self):
+        missing = self.MISSING_TRADE_NUM
+        for ordinal, pnl, trade_num in zip(self.dates.tolist(), self.pnl.tolist(), self.trade_nums.tolist()):
+            yield {
+                'date': date.fromordinal(ordinal),
+                'pnl': pnl,
+                'trade_num': trade_num if trade_num != missing else None
+            }
+    
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            trade_num = int(self.trade_nums[index])
             return {
-                'trades': self.trades,
-                'daily_pnl': dict(self.daily_pnl),
-                'stats': self.stats
+                'date': date.fromordinal(int(self.dates[index])),
+                'pnl': float(self.pnl[index]),
+                'trade_num': trade_num if trade_num != self.MISSING_TRADE_NUM else None
             }
-            
-        except Exception as e:
-            raise RuntimeError(f"Error processing Excel file: {str(e)}") from e
+        return TradeTable(self.dates[index], self.pnl[index], self.trade_nums[index])
     
-    def _find_trades_sheet(self, wb, progress_callback=None):
-        sheet_names = self.config.get("sheet_names", ["List of trades"])
-        
-        for sheet_name in wb.sheetnames:
-            for target_name in sheet_names:
-                if target_name.lower() in sheet_name.lower():
-                    if progress_callback:
-                        progress_callback(f"Found sheet: '{sheet_name}'")
-                    return wb[sheet_name]
-        
-        return None
+    def sorted_by_date(self):
+        return self[np.argsort(self.dates, kind='stable')]
     
-    def _analyze_headers(self, sheet, progress_callback=None):
-        headers = {}
-        column_config = self.config.get("excel_columns", {})
-        first_row = list(sheet.iter_rows(min_row=1, max_row=1, values_only=True))[0]
-        
-        for i, header in enumerate(first_row):
-            if header:
-                header_str = str(header).strip()
-                
-                for key, expected_name in column_config.items():
-                    if header_str == expected_name:
-                        headers[key] = i
-                        if progress_callback:
-                            progress_callback(f"Found {expected_name} column")
-                        break
-        
-        required_columns = ['datetime', 'pnl']
-        missing_columns = [col for col in required_columns if col not in headers]
-        
-        if missing_columns:
-            column_names = [column_config.get(col, col) for col in missing_columns]
-            raise ValueError(f"Missing required columns: {', '.join(column_names)}")
-        
-        return headers
+    def daily_pnl(self):
+        """Summed P&L per 'YYYY-MM-DD' key"""
+        if not len(self):
+            return {}
+        ordinals, inverse = np.unique(self.dates, return_inverse=True)
+        totals = np.bincount(inverse, weights=self.pnl)
+        return {date.fromordinal(o).isoformat(): t for o, t in zip(ordinals.tolist(), totals.tolist())}
     
-    def _process_trades(self, sheet, headers, progress_callback=None):
-        self.trades = []
-        self.daily_pnl = defaultdict(float)
-        processed_trade_numbers = set()
-        
-        if progress_callback:
-            progress_callback("Reading Excel data into memory...")
-        
-        all_rows = list(sheet.iter_rows(min_row=2, values_only=True))
-        total_rows = len(all_rows)
+    def daily_counts(self):
+        """Trade count per 'YYYY-MM-DD' key"""
+        ordinals, counts = np.unique(self.dates, return_counts=True)
+        return {date.fromordinal(o).isoformat(): c for o, c in zip(ordinals.tolist(), counts.tolist())}
+    
+    def group_by_date(self):
+        """Map 'YYYY-MM-DD' keys to per-day sub-tables without building per-trade dicts"""
+        if not len(self):
+            return {}
+        ordered = self.sorted_by_date()
+        ordinals, starts = np.unique(ordered.dates, return_index=True)
+        bounds = starts.tolist() + [len(ordered)]
+        return {
+            date.fromordinal(o).isoformat(): ordered[bounds[i]:bounds[i + 1]]
+            for i, o in enumerate(ordinals.tolist())
+        }
+    
+    def month(self, year, month):
+        start = date(year, month, 1).toordinal()
+        end = (date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)).toordinal()
+        return self[(self.dates >= start) & (self.dates < end)]
+    
+    def digest(self):
+        """Content hash of the columns; equal tables hash equal"""
+        hasher = hashlib.blake2b(struct.pack('<Q', len(self)), digest_size=20)
+        for column in (self.dates.astype('<i4'), self.pnl.astype('<f8'), self.trade_nums.astype('<i8')):
+            hasher.update(column.tobytes())
+        return hasher.hexdigest()
+    
+    def range_stats(self, start=None, end=None):
+        """Count, net P&L, wins and losses with their totals and extremes, and trading days over an inclusive date range"""
+        trades = self
+        if start is not None:
+            trades = trades[trades.dates >= start.toordinal()]
+        if end is not None:
+            trades = trades[trades.dates <= end.toordinal()]
+        
+        wins = trades.pnl[trades.pnl > 0]
+        losses = trades.pnl[trades.pnl < 0]
+        return {
+            'total_trades': len(trades),
+            'net_pnl': float(trades.pnl.sum()),
+            'winning_trades': len(wins),
+            'losing_trades': len(losses),
+            'gross_profit': float(wins.sum()),
+            'gross_loss': float(losses.sum()),
+            'largest_win': float(wins.max()) if len(wins) else None,
+            'largest_loss': float(losses.min()) if len(losses) else None,
+            'trading_days': len(np.unique(trades.dates))
+        }
+
+class TradeTableBuilder:
+    """Accumulates parsed trades in fixed-size batches and assembles a TradeTable"""
+    
+    def __init__(self, batch_size=65536):
+        self.batch_size = batch_size
+        self._chunks = []
+        self._dates = []
+        self._pnl = []
+        self._trade_nums = []
+        self._count = 0
+    
+    def __len__(self):
+        return self._count + len(self._dates)
+    
+    def append(self, trade_date, pnl, trade_num):
+        self._dates.append(trade_date.toordinal())
+        self._pnl.append(pnl)
+        self._trade_nums.append(trade_num if isinstance(trade_num, int) and trade_num > 0
+                                else TradeTable.MISSING_TRADE_NUM)
+        if len(self._dates) >= self.batch_size:
+            self._flush()
+    
+    def _flush(self):
+        if not self._dates:
+            return
+        self._chunks.append(TradeTable(self._dates, self._pnl, self._trade_nums))
+        self._count += len(self._dates)
+        self._dates, self._pnl, self._trade_nums = [], [], []
+    
+    def build(self):
+        self._flush()
+        return TradeTable.concatenate(self._chunks)
+
+class TradeDedupeIndex:
+    """Seen-before index for one strategy: Trade #s as an offset bitmap when dense or a sorted array when sparse, content hashes for the rest"""
+    
+    MAGIC = b'TDIX'
+    VERSION = 2
+    HEADER = struct.Struct('<4sHBqQQ')
+    BITMAP, SORTED = 0, 1
+    # A bitmap costs span/8 bytes against 8 bytes per number sorted; use it while span <= 16 * count
+    DENSE_SPAN_PER_NUMBER = 16
+    
+    def __init__(self, trade_nums=None, content_keys=None):
+        self.base = 0
+        self.bitmap = None
+        self.sorted_nums = np.empty(0, dtype=np.int64)
+        self.content_keys = set(content_keys or ())
+        # Numbers added one at a time outside the bitmap's range, folded in by filter_new and to_bytes
+        self.pending = set()
+        self.other_trade_nums = set()
+        if trade_nums is not None:
+            self._store(np.unique(np.asarray(trade_nums, dtype=np.int64)))
+    
+    @classmethod
+    def from_table(cls, trades):
+        index = cls()
+        index.filter_new(trades)
+        return index
+    
+    @classmethod
+    def from_bytes(cls, payload):
+        magic, version, mode, base, size, key_count = cls.HEADER.unpack_from(payload)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError("Unrecognized dedupe index")
+        offset = cls.HEADER.size
+        index = cls(content_keys=np.frombuffer(payload, dtype='<u8', count=key_count,
+                                               offset=offset + (size if mode == cls.BITMAP else 8 * size)).tolist())
+        if mode == cls.BITMAP:
+            index.base = base
+            index.bitmap = bytearray(payload[offset:offset + size])
+        else:
+            index.sorted_nums = np.frombuffer(payload, dtype='<i8', count=size, offset=offset).astype(np.int64)
+        return index
+    
+    def to_bytes(self):
+        self._fold_pending()
+        keys = np.fromiter(self.content_keys, dtype='<u8', count=len(self.content_keys))
+        if self.bitmap is not None:
+            header = self.HEADER.pack(self.MAGIC, self.VERSION, self.BITMAP, self.base, len(self.bitmap), len(keys))
+            body = bytes(self.bitmap)
+        else:
+            header = self.HEADER.pack(self.MAGIC, self.VERSION, self.SORTED, 0, len(self.sorted_nums), len(keys))
+            body = self.sorted_nums.astype('<i8').tobytes()
+        return header + body + keys.tobytes()
+    
+    def copy(self):
+        index = TradeDedupeIndex(content_keys=self.content_keys)
+        index.base = self.base
+        index.bitmap = bytearray(self.bitmap) if self.bitmap is not None else None
+        index.sorted_nums = self.sorted_nums
+        index.pending = set(self.pending)
+        index.other_trade_nums = set(self.other_trade_nums)
+        return index
+    
+    def __contains__(self, trade_num):
+        if isinstance(trade_num, int) and trade_num >= 0:
+            if trade_num in self.pending:
+                return True
+            if self.bitmap is not None:
+                offset = trade_num - self.base
+                return 0 <= offset < 8 * len(self.bitmap) and bool(self.bitmap[offset >> 3] & (1 << (offset & 7)))
+            position = int(np.searchsorted(self.sorted_nums, trade_num))
+            return position < len(self.sorted_nums) and int(self.sorted_nums[position]) == trade_num
+        return trade_num in self.other_trade_nums
+    
+    def add(self, trade_num):
+        if isinstance(trade_num, int) and trade_num >= 0:
+            offset = trade_num - self.base
+            if self.bitmap is not None and 0 <= offset < 8 * len(self.bitmap):
+                self.bitmap[offset >> 3] |= 1 << (offset & 7)
+            else:
+                self.pending.add(trade_num)
+        else:
+            self.other_trade_nums.add(trade_num)
+    
+    @staticmethod
+    def content_keys_for(trades):
+        """64-bit hash of (date, P&L) per trade, used for trades without a Trade #"""
+        ordinals = trades.dates.astype(np.uint64)
+        return (ordinals * np.uint64(0x9E3779B97F4A7C15)) ^ trades.pnl.view(np.uint64)
+    
+    def _numbers(self):
+        """Every stored Trade # as a sorted array"""
+        if self.bitmap is None:
+            return self.sorted_nums
+        bits = np.unpackbits(np.frombuffer(bytes(self.bitmap), dtype=np.uint8), bitorder='little')
+        return np.flatnonzero(bits).astype(np.int64) + self.base
+    
+    def _store(self, numbers):
+        """Hold sorted, unique numbers in whichever layout is smaller"""
+        if len(numbers) and int(numbers[-1] - numbers[0]) + 1 <= self.DENSE_SPAN_PER_NUMBER * len(numbers):
+            self.base = int(numbers[0])
+            bits = np.zeros(int(numbers[-1]) - self.base + 1, dtype=bool)
+            bits[numbers - self.base] = True
+            self.bitmap = bytearray(np.packbits(bits, bitorder='little').tobytes())
+            self.sorted_nums = np.empty(0, dtype=np.int64)
+        else:
+            self.base = 0
+            self.bitmap = None
+            self.sorted_nums = numbers
+    
+    def _fold_pending(self):
+        if self.pending:
+            pending = np.fromiter(self.pending, dtype=np.int64, count=len(self.pending))
+            self.pending = set()
+            self._add_numbers(pending)
+    
+    def _add_numbers(self, numbers):
+        if not len(numbers):
+            return
+        if self.bitmap is not None:
+            offsets = numbers - self.base
+            if offsets.min() >= 0 and offsets.max() < 8 * len(self.bitmap):
+                bits = np.frombuffer(self.bitmap, dtype=np.uint8)
+                np.bitwise_or.at(bits, offsets >> 3, np.left_shift(1, offsets & 7).astype(np.uint8))
+                return
+        self._store(np.union1d(self._numbers(), numbers))
+    
+    def _contains_numbers(self, numbers):
+        """Membership of each number, tested against the stored layout without expanding it"""
+        if self.bitmap is not None:
+            offsets = numbers - self.base
+            inside = (offsets >= 0) & (offsets < 8 * len(self.bitmap))
+            found = np.zeros(len(numbers), dtype=bool)
+            bits = np.frombuffer(self.bitmap, dtype=np.uint8)
+            hit = offsets[inside]
+            found[inside] = ((bits[hit >> 3] >> (hit & 7)) & 1).astype(bool)
+            return found
+        positions = np.minimum(np.searchsorted(self.sorted_nums, numbers), max(len(self.sorted_nums) - 1, 0))
+        return self.sorted_nums[positions] == numbers if len(self.sorted_nums) else np.zeros(len(numbers), dtype=bool)
+    
+    def filter_new(self, trades):
+        """Trades not seen before, now recorded as seen; repeats within trades itself are kept"""
+        self._fold_pending()
+        trade_nums = trades.trade_nums
+        numbered = trade_nums > 0
+        
+        seen = np.zeros(len(trades), dtype=bool)
+        seen[numbered] = self._contains_numbers(trade_nums[numbered])
+        
+        keys = self.content_keys_for(trades)
+        unnumbered = ~numbered
+        if self.content_keys and unnumbered.any():
+            known_keys = np.fromiter(self.content_keys, dtype=np.uint64, count=len(self.content_keys))
+            seen[unnumbered] = np.isin(keys[unnumbered], known_keys)
+        
+        new = ~seen
+        self._add_numbers(np.unique(trade_nums[new & numbered]))
+        self.content_keys.update(keys[new & unnumbered].tolist())
+        
+        return trades[new]
+
+class ImportCheckpoint:
+    """Periodic snapshot of a running import: parser position, skip counts and the trades parsed so far"""
+    
+    MAGIC = b'TCKP'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHQI')
+    
+    def __init__(self, path, interval_s=15.0):
+        self.path = path
+        self.interval_s = interval_s
+        self.last_saved = time.monotonic()
+    
+    def due(self):
+        return time.monotonic() - self.last_saved >= self.interval_s
+    
+    def save(self, importer_name, rows_parsed, trades, skipped):
+        metadata = json.dumps({
+            'importer': importer_name,
+            'rows_parsed': rows_parsed,
+            'skipped': dict(skipped),
+            'saved_at': datetime.now().isoformat()
+        }).encode('utf-8')
+        payload = b''.join([
+            self.HEADER.pack(self.MAGIC, self.VERSION, len(trades), len(metadata)),
+            metadata,
+            trades.dates.astype('<i4').tobytes(),
+            trades.pnl.astype('<f8').tobytes(),
+            trades.trade_nums.astype('<i8').tobytes()
+        ])
+        
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(temp_path, self.path)
+        self.last_saved = time.monotonic()
+    
+    def load(self):
+        """The saved state, or None when there is no readable checkpoint"""
+        try:
+            with open(self.path, 'rb') as f:
+                payload = f.read()
+            magic, version, count, metadata_length = self.HEADER.unpack_from(payload)
+            if magic != self.MAGIC or version != self.VERSION:
+                return None
+            
+            offset = self.HEADER.size
+            state = json.loads(payload[offset:offset + metadata_length].decode('utf-8'))
+            offset += metadata_length
+            dates = np.frombuffer(payload, dtype='<i4', count=count, offset=offset)
+            offset += 4 * count
+            pnl = np.frombuffer(payload, dtype='<f8', count=count, offset=offset)
+            offset += 8 * count
+            trade_nums = np.frombuffer(payload, dtype='<i8', count=count, offset=offset)
+        except (IOError, OSError, ValueError, struct.error):
+            return None
         
-        if total_rows == 0:
-            if progress_callback:
-                progress_callback("No data rows found")
+        state['trades'] = TradeTable(dates, pnl, trade_nums)
+        return state
+    
+    def discard(self):
+        # A writer killed mid-save can leave its temp file behind as well
+        for path in (self.path, f"{self.path}.tmp"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+class SessionSnapshot:
+    """Saved session as packed little-endian columns behind a small header; loading maps the file instead of parsing it"""
+    
+    MAGIC = b'TCSS'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHQI')
+    EXTENSION = '.tcs'
+    
+    @classmethod
+    def to_bytes(cls, trades, metadata):
+        """Header, JSON metadata padded to 8 bytes, then the P&L, Trade # and date ordinal columns"""
+        encoded = json.dumps(metadata).encode('utf-8')
+        encoded += b' ' * (-(cls.HEADER.size + len(encoded)) % 8)
+        return b''.join([
+            cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(trades), len(encoded)),
+            encoded,
+            trades.pnl.astype('<f8').tobytes(),
+            trades.trade_nums.astype('<i8').tobytes(),
+            trades.dates.astype('<i4').tobytes()
+        ])
+    
+    @classmethod
+    def from_buffer(cls, buffer):
+        """(trades, metadata); the trade columns are read-only views over buffer, not copies"""
+        magic, version, count, metadata_length = cls.HEADER.unpack_from(buffer)
+        if magic != cls.MAGIC:
+            raise ValueError("Not a session snapshot")
+        if version > cls.VERSION:
+            raise ValueError(f"Snapshot format v{version} is newer than this version supports")
+        
+        offset = cls.HEADER.size
+        metadata = json.loads(bytes(buffer[offset:offset + metadata_length]).decode('utf-8'))
+        offset += metadata_length
+        pnl = np.frombuffer(buffer, dtype='<f8', count=count, offset=offset)
+        offset += 8 * count
+        trade_nums = np.frombuffer(buffer, dtype='<i8', count=count, offset=offset)
+        offset += 8 * count
+        dates = np.frombuffer(buffer, dtype='<i4', count=count, offset=offset)
+        return TradeTable(dates, pnl, trade_nums), metadata
+    
+    @classmethod
+    def load(cls, path):
+        """(trades, metadata) read into memory, so nothing keeps the file open afterwards"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < cls.HEADER.size:
+            raise ValueError("Truncated session snapshot")
+        return cls.from_buffer(data)
+    
+    @classmethod
+    def map(cls, path):
+        """(trades, metadata, mapping) with the columns over a read-only map; close mapping before deleting the file"""
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < cls.HEADER.size:
+                raise ValueError("Truncated session snapshot")
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            trades, metadata = cls.from_buffer(mapping)
+        except (ValueError, struct.error):
+            mapping.close()
+            raise
+        return trades, metadata, mapping
+
+class TradeStore:
+    """Trades of every imported strategy in one SQLite database, indexed by (strategy, date), with per-day totals alongside"""
+    
+    BATCH_SIZE = 50000
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS imports (
+            id INTEGER PRIMARY KEY,
+            strategy TEXT NOT NULL,
+            source_filename TEXT,
+            imported_at TEXT NOT NULL,
+            trade_count INTEGER NOT NULL,
+            digest TEXT
+        );
+        CREATE INDEX IF NOT EXISTS imports_strategy ON imports(strategy);
+        CREATE TABLE IF NOT EXISTS trades (
+            import_id INTEGER NOT NULL REFERENCES imports(id),
+            strategy TEXT NOT NULL,
+            date INTEGER NOT NULL,
+            pnl REAL NOT NULL,
+            trade_num INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS trades_strategy_date ON trades(strategy, date);
+        CREATE TABLE IF NOT EXISTS daily_pnl (
+            strategy TEXT NOT NULL,
+            date INTEGER NOT NULL,
+            pnl REAL NOT NULL,
+            trades INTEGER NOT NULL,
+            wins INTEGER NOT NULL,
+            losses INTEGER NOT NULL,
+            gross_profit REAL NOT NULL,
+            gross_loss REAL NOT NULL,
+            best REAL NOT NULL,
+            worst REAL NOT NULL,
+            PRIMARY KEY (strategy, date)
+        ) WITHOUT ROWID;
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._schema_ready = False
+    
+    @contextlib.contextmanager
+    def _connect(self):
+        """Connection for one transaction; each call opens its own, so any thread may use the store"""
+        conn = sqlite3.connect(self.path)
+        try:
+            if not self._schema_ready:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(self.SCHEMA)
+                self._schema_ready = True
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def replace_trades(self, strategy, source_filename, trades, digest):
+        """Make trades the strategy's only stored trades; digest is TradeTable.digest of them"""
+        with self._connect() as conn:
+            for table in ('trades', 'daily_pnl', 'imports'):
+                conn.execute(f"DELETE FROM {table} WHERE strategy = ?", (strategy,))
+            self._insert(conn, strategy, source_filename, trades, digest)
+    
+    def append_trades(self, strategy, source_filename, trades, digest):
+        """Add trades after the stored ones; digest is TradeTable.digest of everything stored afterwards"""
+        with self._connect() as conn:
+            self._insert(conn, strategy, source_filename, trades, digest)
+    
+    def _insert(self, conn, strategy, source_filename, trades, digest):
+        import_id = conn.execute(
+            "INSERT INTO imports (strategy, source_filename, imported_at, trade_count, digest) VALUES (?, ?, ?, ?, ?)",
+            (strategy, source_filename, datetime.now().isoformat(), len(trades), digest)).lastrowid
+        
+        missing = TradeTable.MISSING_TRADE_NUM
+        for start in range(0, len(trades), self.BATCH_SIZE):
+            batch = trades[start:start + self.BATCH_SIZE]
+            conn.executemany(
+                "INSERT INTO trades (import_id, strategy, date, pnl, trade_num) VALUES (?, ?, ?, ?, ?)",
+                ((import_id, strategy, ordinal, pnl, trade_num if trade_num != missing else None)
+                 for ordinal, pnl, trade_num in zip(batch.dates.tolist(), batch.pnl.tolist(),
+                                                    batch.trade_nums.tolist())))
+        
+        if len(trades):
+            pnl = trades.pnl
+            ordinals, inverse, counts = np.unique(trades.dates, return_inverse=True, return_counts=True)
+            best = np.full(len(ordinals), -np.inf)
+            worst = np.full(len(ordinals), np.inf)
+            np.maximum.at(best, inverse, pnl)
+            np.minimum.at(worst, inverse, pnl)
+            columns = [
+                ordinals, np.bincount(inverse, weights=pnl), counts,
+                np.bincount(inverse, weights=pnl > 0).astype(np.int64),
+                np.bincount(inverse, weights=pnl < 0).astype(np.int64),
+                np.bincount(inverse, weights=np.where(pnl > 0, pnl, 0)),
+                np.bincount(inverse, weights=np.where(pnl < 0, pnl, 0)),
+                best, worst
+            ]
+            conn.executemany(
+                "INSERT INTO daily_pnl (strategy, date, pnl, trades, wins, losses, gross_profit, gross_loss, best, worst) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (strategy, date) DO UPDATE SET "
+                "pnl = pnl + excluded.pnl, trades = trades + excluded.trades, wins = wins + excluded.wins, "
+                "losses = losses + excluded.losses, gross_profit = gross_profit + excluded.gross_profit, "
+                "gross_loss = gross_loss + excluded.gross_loss, best = MAX(best, excluded.best), "
+                "worst = MIN(worst, excluded.worst)",
+                ((strategy, *row) for row in zip(*(column.tolist() for column in columns))))
+    
+    def digest(self, strategy):
+        """Digest of the strategy's stored trades as of its latest write, None if it has none"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT digest FROM imports WHERE strategy = ? ORDER BY id DESC LIMIT 1",
+                               (strategy,)).fetchone()
+        return row[0] if row else None
+    
+    @staticmethod
+    def _where(strategies, start=None, end=None):
+        """WHERE clause and parameters for a strategy subset and an inclusive date range"""
+        clauses = [f"strategy IN ({', '.join('?' * len(strategies))})"]
+        params = list(strategies)
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(start.toordinal())
+        if end is not None:
+            clauses.append("date <= ?")
+            params.append(end.toordinal())
+        return " WHERE " + " AND ".join(clauses), params
+    
+    def daily_pnl(self, strategies, start=None, end=None):
+        """Summed P&L per 'YYYY-MM-DD' key across the strategies, from the precomputed daily totals"""
+        where, params = self._where(strategies, start, end)
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT date, SUM(pnl) FROM daily_pnl{where} GROUP BY date", params).fetchall()
+        return {date.fromordinal(ordinal).isoformat(): pnl for ordinal, pnl in rows}
+    
+    def trades(self, strategies, start=None, end=None):
+        where, params = self._where(strategies, start, end)
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT date, pnl, trade_num FROM trades{where} ORDER BY date, rowid",
+                                params).fetchall()
+        if not rows:
+            return TradeTable()
+        dates, pnl, trade_nums = zip(*rows)
+        missing = TradeTable.MISSING_TRADE_NUM
+        return TradeTable(dates, pnl, [missing if n is None else n for n in trade_nums])
+    
+    def range_stats(self, strategies, start=None, end=None):
+        """TradeTable.range_stats summed from the precomputed daily totals, one row per strategy and day"""
+        where, params = self._where(strategies, start, end)
+        with self._connect() as conn:
+            count, net, wins, losses, gross_profit, gross_loss, best, worst, trading_days = conn.execute(
+                f"SELECT COALESCE(SUM(trades), 0), COALESCE(SUM(pnl), 0), COALESCE(SUM(wins), 0), "
+                f"COALESCE(SUM(losses), 0), COALESCE(SUM(gross_profit), 0), COALESCE(SUM(gross_loss), 0), "
+                f"MAX(best), MIN(worst), COUNT(DISTINCT date) FROM daily_pnl{where}", params).fetchone()
+        return {
+            'total_trades': count,
+            'net_pnl': net,
+            'winning_trades': wins,
+            'losing_trades': losses,
+            'gross_profit': gross_profit,
+            'gross_loss': gross_loss,
+            'largest_win': best if wins else None,
+            'largest_loss': worst if losses else None,
+            'trading_days': trading_days
+        }
+
+# ================================ TRADE PROCESSING ================================
+
+class ImportCancelled(Exception):
+    """Raised inside the parser once the import's cancel event is set"""
+
+class ImportProfiler:
+    """Wall/CPU time, row throughput and peak memory per import stage, plus counts of skipped rows by reason"""
+    
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.stages = []
+        self.skipped = defaultdict(int)
+        self.quality = None
+        self._current = None
+        self._started_tracing = False
+    
+    @classmethod
+    def from_report(cls, report):
+        profiler = cls()
+        profiler.stages = list(report['stages'])
+        profiler.skipped.update(report['skipped'])
+        profiler.quality = report.get('quality')
+        return profiler
+    
+    def begin(self, stage):
+        """Start timing a stage, closing the previous one"""
+        self.end()
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+        self._current = (stage, time.perf_counter(), time.process_time())
+    
+    def end(self, rows=None):
+        if self._current is None:
+            return
+        stage, wall_start, cpu_start = self._current
+        self._current = None
+        
+        wall = time.perf_counter() - wall_start
+        self.stages.append({
+            'stage': stage,
+            'wall_s': wall,
+            'cpu_s': time.process_time() - cpu_start,
+            'rows': rows,
+            'rows_per_s': rows / wall if rows and wall > 0 else None,
+            'peak_memory_bytes': tracemalloc.get_traced_memory()[1] if self.track_memory else None
+        })
+    
+    def finish(self):
+        self.end()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+    
+    def report(self, file_path=None):
+        return {
+            'file': os.path.basename(file_path) if file_path else None,
+            'created': datetime.now().isoformat(),
+            'wall_s': sum(stage['wall_s'] for stage in self.stages),
+            'cpu_s': sum(stage['cpu_s'] for stage in self.stages),
+            'peak_rss_bytes': self._peak_rss_bytes(),
+            'stages': self.stages,
+            'skipped': dict(self.skipped),
+            'quality': self.quality
+        }
+    
+    def _peak_rss_bytes(self):
+        try:
+            import resource
+        except ImportError:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    
+    @staticmethod
+    def format_report(report):
+        """Loading dialog lines for a profile report"""
+        lines = ["Stage timings:"]
+        for stage in report['stages']:
+            line = f"  {stage['stage']:<18} {stage['wall_s']:7.3f}s wall {stage['cpu_s']:7.3f}s cpu"
+            if stage['rows_per_s']:
+                line += f"  {stage['rows_per_s']:,.0f} rows/s"
+            if stage['peak_memory_bytes'] is not None:
+                line += f"  peak {stage['peak_memory_bytes'] / 1024 / 1024:.1f} MB"
+            lines.append(line)
+        
+        if report['skipped']:
+            reasons = ", ".join(f"{reason} {count}" for reason, count in sorted(report['skipped'].items()))
+            lines.append(f"Skipped rows: {reasons}")
+        if report.get('quality') is not None:
+            lines.extend(TradeQualityCheck.format_report(report['quality']))
+        return lines
+
+class TradeQualityCheck:
+    """Vectorized anomaly scan over imported trades; findings are reported, trades are never dropped"""
+    
+    LABELS = {
+        'duplicate_rows': "Possible duplicate rows (same day and P&L, different Trade #)",
+        'trade_num_gaps': "Missing Trade #s",
+        'outliers': "P&L outliers",
+        'weekend_trades': "Weekend-dated trades",
+        'cumulative_mismatch_days': "Days disagreeing with cumulative P&L"
+    }
+    
+    def __init__(self, config=None):
+        quality_config = (config or DEFAULT_CONFIG).get("quality", {})
+        self.outlier_z = quality_config.get("outlier_z", 6.0)
+        self.examples = quality_config.get("examples", 3)
+    
+    def run(self, trades, cumulative=None):
+        """Finding name -> {'count', 'examples'}; the cumulative check needs one cumulative P&L per trade"""
+        if not len(trades):
+            return {}
+        
+        report = {
+            'duplicate_rows': self._duplicate_rows(trades),
+            'trade_num_gaps': self._trade_num_gaps(trades),
+            'outliers': self._outliers(trades),
+            'weekend_trades': self._weekend_trades(trades)
+        }
+        if cumulative is not None and len(cumulative) == len(trades):
+            mismatches = self._cumulative_mismatches(trades, cumulative)
+            if mismatches is not None:
+                report['cumulative_mismatch_days'] = mismatches
+        return report
+    
+    def _finding(self, count, examples):
+        return {'count': int(count), 'examples': examples[:self.examples]}
+    
+    def _duplicate_rows(self, trades):
+        numbered = trades[trades.trade_nums > 0]
+        order = np.lexsort((numbered.pnl, numbered.dates))
+        dates, pnl, trade_nums = numbered.dates[order], numbered.pnl[order], numbered.trade_nums[order]
+        
+        repeats = np.flatnonzero((dates[1:] == dates[:-1]) & (pnl[1:] == pnl[:-1])) + 1
+        examples = [f"#{trade_nums[i - 1]} and #{trade_nums[i]}: {date.fromordinal(int(dates[i]))} ${pnl[i]:,.2f}"
+                    for i in repeats[:self.examples].tolist()]
+        return self._finding(len(repeats), examples)
+    
+    def _trade_num_gaps(self, trades):
+        trade_nums = np.unique(trades.trade_nums[trades.trade_nums > 0])
+        steps = np.diff(trade_nums)
+        gaps = np.flatnonzero(steps > 1)
+        
+        examples = []
+        for i in gaps[:self.examples].tolist():
+            first, last = int(trade_nums[i]) + 1, int(trade_nums[i + 1]) - 1
+            examples.append(f"#{first}" if first == last else f"#{first}-#{last}")
+        return self._finding((steps[gaps] - 1).sum(), examples)
+    
+    def _outliers(self, trades):
+        """Robust z-score: distance from the median in units of the scaled median absolute deviation"""
+        median = np.median(trades.pnl)
+        mad = np.median(np.abs(trades.pnl - median))
+        if mad == 0:
+            return self._finding(0, [])
+        
+        z = 0.6745 * (trades.pnl - median) / mad
+        flagged = np.flatnonzero(np.abs(z) > self.outlier_z)
+        worst = flagged[np.argsort(-np.abs(z[flagged]))][:self.examples]
+        examples = [f"{date.fromordinal(int(trades.dates[i]))} ${trades.pnl[i]:,.2f} (z {z[i]:.1f})"
+                    for i in worst.tolist()]
+        return self._finding(len(flagged), examples)
+    
+    def _weekend_trades(self, trades):
+        weekend = (trades.dates - 1) % 7 >= 5    # ordinal 1 is a Monday
+        days = np.unique(trades.dates[weekend])
+        examples = [date.fromordinal(o).strftime('%a %Y-%m-%d') for o in days[:self.examples].tolist()]
+        return self._finding(np.count_nonzero(weekend), examples)
+    
+    def _cumulative_mismatches(self, trades, cumulative):
+        """Days whose summed P&L differs from the day's movement in the export's cumulative P&L column"""
+        if not (np.isfinite(cumulative).all() and (trades.trade_nums > 0).all()):
+            return None
+        
+        order = np.argsort(trades.trade_nums, kind='stable')
+        movements = np.diff(cumulative[order])
+        dates, pnl = trades.dates[order][1:], trades.pnl[order][1:]
+        if not len(dates):
+            return None
+        
+        days, inverse, counts = np.unique(dates, return_inverse=True, return_counts=True)
+        day_pnl = np.bincount(inverse, weights=pnl)
+        day_movement = np.bincount(inverse, weights=movements)
+        # Each cumulative value is rounded to the cent, so allow a cent per trade
+        bad = np.flatnonzero(np.abs(day_pnl - day_movement) > 0.01 * counts + 1e-6)
+        
+        examples = [f"{date.fromordinal(int(days[i]))}: trades ${day_pnl[i]:,.2f}, cumulative ${day_movement[i]:,.2f}"
+                    for i in bad[:self.examples].tolist()]
+        return self._finding(len(bad), examples)
+    
+    @staticmethod
+    def format_report(report):
+        """Loading dialog lines for a quality report"""
+        flagged = [(name, finding) for name, finding in report.items() if finding['count']]
+        if not flagged:
+            return ["Data quality: no anomalies found"]
+        
+        lines = ["Data quality:"]
+        for name, finding in flagged:
+            lines.append(f"  {TradeQualityCheck.LABELS.get(name, name)}: {finding['count']}")
+            if finding['examples']:
+                lines.append(f"    e.g. {'; '.join(finding['examples'])}")
+        return lines
+
+class PipelinedReader(io.RawIOBase):
+    """Decompresses on a background thread into a bounded queue, so inflating the next block overlaps parsing this one"""
+    
+    def __init__(self, open_stream, chunk_size=1024 * 1024, depth=8):
+        super().__init__()
+        self.chunk_size = chunk_size
+        self.chunks = queue.Queue(maxsize=depth)
+        self.pending = memoryview(b'')
+        self.eof = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._produce, args=(open_stream,), daemon=True)
+        self.thread.start()
+    
+    def _produce(self, open_stream):
+        try:
+            with open_stream() as stream:
+                while not self.stopped.is_set():
+                    chunk = stream.read(self.chunk_size)
+                    self._put(chunk)
+                    if not chunk:
+                        return
+        except Exception as e:
+            self._put(e)
+    
+    def _put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        if not self.pending:
+            if self.eof:
+                return 0
+            item = self.chunks.get()
+            if isinstance(item, Exception):
+                raise item
+            if not item:
+                self.eof = True
+                return 0
+            self.pending = memoryview(item)
+    
+        count = min(len(buffer), len(self.pending))
+        buffer[:count] = self.pending[:count]
+        self.pending = self.pending[count:]
+        return count
+    
+    def close(self):
+        if not self.closed:
+            self.stopped.set()
+            self.thread.join()
+        super().close()
+
+class ExportSource:
+    """The bytes an import reads: a plain file, or one export inside a .gz or .zip bundle, inflated as it streams"""
+    
+    EXPORT_EXTENSIONS = ('.csv', '.txt', '.xlsx', '.xls', '.htm', '.html')
+    SAMPLE_BYTES = 64 * 1024
+    
+    def __init__(self, file_path, config=None):
+        self.path = file_path
+        self.config = config or DEFAULT_CONFIG
+        self.compression = self._detect_compression(file_path)
+        self.member = None
+        if self.compression == 'gzip':
+            base_name = os.path.basename(file_path)
+            self.member = base_name[:-3] if base_name.lower().endswith('.gz') else base_name
+        self._sample = None
+        self._spool = None
+    
+    @staticmethod
+    def _detect_compression(file_path):
+        with open(file_path, 'rb') as f:
+            signature = f.read(4)
+    
+        if signature.startswith(b'\x1f\x8b'):
+            return 'gzip'
+        if signature == b'PK\x03\x04':
+            with zipfile.ZipFile(file_path) as archive:
+                names = set(archive.namelist())
+            # A workbook is a zip too; only zips that are not workbooks are bundles of exports
+            if '[Content_Types].xml' not in names:
+                return 'zip'
+        return None
+    
+    @property
+    def name(self):
+        if self.compression == 'zip':
+            return f"{os.path.basename(self.path)}/{self.member}"
+        return os.path.basename(self.path)
+    
+    def members(self):
+        """Exports held by a zip bundle, in archive order"""
+        if self.compression != 'zip':
+            return []
+    
+        with zipfile.ZipFile(self.path) as archive:
+            return [info.filename for info in archive.infolist()
+                    if not info.is_dir()
+                    and not info.filename.startswith('__MACOSX/')
+                    and not os.path.basename(info.filename).startswith('.')
+                    and info.filename.lower().endswith(self.EXPORT_EXTENSIONS)]
+    
+    def select(self, member):
+        """Point the source at another member of a zip bundle"""
+        self.close()
+        self.member = member
+        self._sample = None
+    
+    @property
+    def size(self):
+        """Uncompressed size; gzip only records it modulo 4 GB, so for gzip this is an estimate"""
+        if self.compression == 'zip':
+            with zipfile.ZipFile(self.path) as archive:
+                return archive.getinfo(self.member).file_size
+    
+        file_size = os.path.getsize(self.path)
+        if self.compression == 'gzip':
+            with open(self.path, 'rb') as f:
+                f.seek(-4, os.SEEK_END)
+                recorded = struct.unpack('<I', f.read(4))[0]
+            return recorded if recorded >= file_size else recorded + (1 << 32)
+        return file_size
+    
+    def sample(self):
+        """The first 64 KB of the export, decompressed"""
+        if self._sample is None:
+            with self._open_raw() as stream:
+                self._sample = stream.read(self.SAMPLE_BYTES)
+        return self._sample
+    
+    def tail_bytes(self, count):
+        """The export's last count bytes; a compressed export is inflated end to end to reach them"""
+        if not self.compression:
+            with open(self.path, 'rb') as f:
+                f.seek(max(0, os.path.getsize(self.path) - count))
+                return f.read()
+        
+        tail = []
+        tail_size = 0
+        with self._open_raw() as stream:
+            for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+                tail.append(chunk)
+                tail_size += len(chunk)
+                while tail_size - len(tail[0]) >= count:
+                    tail_size -= len(tail.pop(0))
+        return b''.join(tail)[-count:]
+    
+    @contextlib.contextmanager
+    def _open_raw(self):
+        if self.compression == 'gzip':
+            with gzip.open(self.path, 'rb') as stream:
+                yield stream
+        elif self.compression == 'zip':
+            with zipfile.ZipFile(self.path) as archive, archive.open(self.member) as stream:
+                yield stream
+        else:
+            with open(self.path, 'rb') as stream:
+                yield stream
+    
+    def open(self):
+        """Buffered binary stream over the export; compressed exports inflate on a background thread"""
+        import_config = self.config.get("import", {})
+        buffer_size = import_config.get("csv_buffer_size", 1024 * 1024)
+        if not self.compression:
+            return open(self.path, 'rb', buffering=buffer_size)
+    
+        reader = PipelinedReader(self._open_raw, buffer_size, import_config.get("decompress_queue_chunks", 8))
+        return io.BufferedReader(reader, buffer_size)
+    
+    def seekable(self):
+        """What zipfile and openpyxl need to seek in: the path itself, or the export spooled out of its bundle"""
+        if not self.compression:
+            return self.path
+    
+        if self._spool is None:
+            spool_bytes = self.config.get("import", {}).get("archive_spool_bytes", 64 * 1024 * 1024)
+            self._spool = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+            with self.open() as stream:
+                shutil.copyfileobj(stream, self._spool, 1024 * 1024)
+        self._spool.seek(0)
+        return self._spool
+    
+    def close(self):
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+class PrefixedStream:
+    """A readable stream that yields prefix bytes before continuing with another stream"""
+    
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+    
+    def read(self, size=-1):
+        if not self.prefix:
+            return self.stream.read(size)
+        if size is None or size < 0:
+            data, self.prefix = self.prefix + self.stream.read(), b''
+        else:
+            data, self.prefix = self.prefix[:size], self.prefix[size:]
+        return data
+    
+    def close(self):
+        self.stream.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+class XlsxTradesReader:
+    """Streams cell values straight out of an .xlsx archive, bypassing openpyxl"""
+    
+    RELATIONSHIP_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+    SEEK_MIN_ROW = 1000
+    
+    def __init__(self, file_path):
+        self.archive = zipfile.ZipFile(file_path)
+        self.sheet_paths = {}
+        self.shared_strings_path = 'xl/sharedStrings.xml'
+        self.epoch = datetime(1899, 12, 30)
+        self.last_row_number = None
+        self._shared_strings = []
+        self._shared_strings_iter = None
+        self._read_workbook()
+    
+    @property
+    def sheetnames(self):
+        return list(self.sheet_paths)
+    
+    def close(self):
+        self.archive.close()
+    
+    def _read_workbook(self):
+        relationships = self._read_relationships()
+        workbook = ET.fromstring(self.archive.read('xl/workbook.xml'))
+        ns = self._namespace(workbook.tag)
+        
+        workbook_props = workbook.find(f'{ns}workbookPr')
+        if workbook_props is not None and workbook_props.get('date1904') in ('1', 'true'):
+            self.epoch = datetime(1904, 1, 1)
+        
+        sheets = workbook.find(f'{ns}sheets')
+        for sheet in (sheets if sheets is not None else []):
+            rel_id = next((value for key, value in sheet.attrib.items() if key.endswith('}id')), None)
+            target = relationships.get(rel_id)
+            if target:
+                self.sheet_paths[sheet.get('name')] = target
+    
+    def _read_relationships(self):
+        relationships = {}
+        rels = ET.fromstring(self.archive.read('xl/_rels/workbook.xml.rels'))
+        
+        for rel in rels.iter(f'{{{self.RELATIONSHIP_NS}}}Relationship'):
+            target = rel.get('Target', '')
+            target = target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+            if rel.get('Type', '').endswith('/sharedStrings'):
+                self.shared_strings_path = target
+            relationships[rel.get('Id')] = target
+        
+        return relationships
+    
+    def _namespace(self, tag):
+        return tag[:tag.index('}') + 1] if tag.startswith('{') else ''
+    
+    def _shared_string(self, index):
+        """Resolve a shared string, parsing sharedStrings.xml only as far as needed"""
+        while index >= len(self._shared_strings):
+            if self._shared_strings_iter is None:
+                self._shared_strings_iter = self._iter_shared_strings()
+            value = next(self._shared_strings_iter, None)
+            if value is None:
+                return None
+            self._shared_strings.append(value)
+        return self._shared_strings[index]
+    
+    def _iter_shared_strings(self):
+        if self.shared_strings_path not in self.archive.namelist():
+            return
+        
+        with self.archive.open(self.shared_strings_path) as src:
+            for event, elem in ET.iterparse(src, events=('end',)):
+                ns = self._namespace(elem.tag)
+                if elem.tag != f'{ns}si':
+                    continue
+                yield ''.join(t.text or '' for t in elem.iter(f'{ns}t'))
+                elem.clear()
+    
+    def max_row(self, sheet_name):
+        """Last row declared by the sheet's <dimension>, None if undeclared"""
+        with self.archive.open(self.sheet_paths[sheet_name]) as src:
+            for event, elem in ET.iterparse(src, events=('start',)):
+                ns = self._namespace(elem.tag)
+                if elem.tag == f'{ns}dimension':
+                    ref = elem.get('ref', '').split(':')[-1]
+                    digits = ''.join(ch for ch in ref if ch.isdigit())
+                    return int(digits) if digits else None
+                if elem.tag == f'{ns}sheetData':
+                    return None
+        return None
+    
+    def iter_rows(self, sheet_name, min_row=1, columns=None, date_columns=()):
+        """Yield row value tuples; cells outside columns are never decoded"""
+        width = max(columns) + 1 if columns else 0
+        
+        with self._open_sheet(sheet_name, min_row) as src:
+            context = ET.iterparse(src, events=('start', 'end'))
+            event, root = next(context)
+            ns = self._namespace(root.tag)
+            row_tag = f'{ns}row'
+            sheet_data_tag = f'{ns}sheetData'
+            value_tag = f'{ns}v'
+            sheet_data = None
+            row_number = 0
+            
+            for event, elem in context:
+                if event == 'start':
+                    if sheet_data is None and elem.tag == sheet_data_tag:
+                        sheet_data = elem
+                    continue
+                if elem.tag != row_tag:
+                    continue
+                
+                row_ref = elem.get('r')
+                row_number = int(row_ref) if row_ref else row_number + 1
+                if row_number < min_row:
+                    sheet_data.clear()
+                    continue
+                
+                values = self._row_values(elem, width, columns, date_columns, value_tag)
+                sheet_data.clear()
+                yield values
+    
+    def _open_sheet(self, sheet_name, min_row=1):
+        """The sheet XML; far into the sheet, rows before min_row are cut out by byte search rather than parsed"""
+        src = self.archive.open(self.sheet_paths[sheet_name])
+        if min_row < self.SEEK_MIN_ROW:
+            return src
+        
+        head = src.read(1024 * 1024)
+        worksheet = re.search(rb'<(\w+:)?worksheet\b[^>]*>', head)
+        sheet_data = re.search(rb'<(\w+:)?sheetData\b[^>]*>', head)
+        if not (worksheet and sheet_data and re.search(rb'<(?:\w+:)?row\b[^>]*\sr="', head)):
+            # No row references to search for: parse from the top and skip by row number
+            src.close()
+            return self.archive.open(self.sheet_paths[sheet_name])
+        
+        opening = worksheet.group(0) + sheet_data.group(0)
+        buffer = head
+        while True:
+            start = self._find_row_tag(buffer, min_row)
+            if start is not None:
+                return PrefixedStream(opening + buffer[start:], src)
+            chunk = src.read(1024 * 1024)
+            if not chunk:
+                break
+            buffer = buffer[-256:] + chunk
+        
+        src.close()
+        closing = (b'</' + (sheet_data.group(1) or b'') + b'sheetData></' +
+                   (worksheet.group(1) or b'') + b'worksheet>')
+        return PrefixedStream(opening + closing, io.BytesIO())
+    
+    def _find_row_tag(self, buffer, row_number):
+        """Offset of the <row> tag for row_number; a plain find, since cell references carry column letters"""
+        needle = b' r="%d"' % row_number
+        position = buffer.find(needle)
+        while position != -1:
+            start = buffer.rfind(b'<', 0, position)
+            if start != -1 and re.match(rb'<(?:\w+:)?row\b', buffer[start:start + 16]):
+                return start
+            position = buffer.find(needle, position + 1)
+        return None
+    
+    def tail_rows(self, sheet_name, count, min_row=1, columns=None, date_columns=(), window=4 * 1024 * 1024):
+        """The sheet's last rows: the sheet XML is inflated without parsing and only its final window is parsed"""
+        head = b''
+        tail = []
+        tail_size = 0
+        with self.archive.open(self.sheet_paths[sheet_name]) as src:
+            for chunk in iter(lambda: src.read(1024 * 1024), b''):
+                if not head:
+                    head = chunk
+                tail.append(chunk)
+                tail_size += len(chunk)
+                while tail_size - len(tail[0]) >= window:
+                    tail_size -= len(tail.pop(0))
+        
+        worksheet = re.search(rb'<(\w+:)?worksheet\b[^>]*>', head)
+        sheet_data = re.search(rb'<(\w+:)?sheetData\b[^>]*>', head)
+        if worksheet is None or sheet_data is None:
+            return []
+        
+        text = b''.join(tail)
+        starts = [m.start() for m in re.finditer(rb'<(?:\w+:)?row[\s>]', text)]
+        if not starts:
+            return []
+        end = re.search(rb'</(?:\w+:)?sheetData>', text)
+        body = text[starts[-count] if len(starts) >= count else starts[0]:end.start() if end else len(text)]
+        
+        prefix = (worksheet.group(1) or b'')
+        document = (worksheet.group(0) + sheet_data.group(0) + body +
+                    b'</' + (sheet_data.group(1) or b'') + b'sheetData></' + prefix + b'worksheet>')
+        root = ET.fromstring(document)
+        ns = self._namespace(root.tag)
+        width = max(columns) + 1 if columns else 0
+        
+        rows = []
+        for elem in root.iter(f'{ns}row'):
+            row_ref = elem.get('r')
+            if row_ref:
+                self.last_row_number = int(row_ref)
+                if self.last_row_number < min_row:
+                    continue
+            rows.append(self._row_values(elem, width, columns, date_columns, f'{ns}v'))
+        return rows[-count:]
+    
+    def _row_values(self, elem, width, columns, date_columns, value_tag):
+        values = [None] * width
+        col = -1
+        for cell in elem:
+            ref = cell.get('r')
+            col = self._column_index(ref) if ref else col + 1
+            if columns is not None and col not in columns:
+                continue
+            if col >= len(values):
+                values.extend([None] * (col + 1 - len(values)))
+            values[col] = self._cell_value(cell, value_tag, col in date_columns)
+        return tuple(values)
+    
+    def _column_index(self, ref):
+        index = 0
+        for ch in ref:
+            if ch.isdigit():
+                break
+            index = index * 26 + ord(ch) - 64
+        return index - 1
+    
+    def _cell_value(self, cell, value_tag, is_date):
+        cell_type = cell.get('t')
+        
+        if cell_type == 'inlineStr':
+            return ''.join(cell.itertext())
+        
+        value = cell.find(value_tag)
+        if value is None or value.text is None:
+            return None
+        text = value.text
+        
+        if cell_type == 's':
+            return self._shared_string(int(text))
+        if cell_type in ('str', 'e'):
+            return text
+        if cell_type == 'b':
+            return text == '1'
+        
+        if is_date:
+            try:
+                return self.epoch + timedelta(days=float(text))
+            except (OverflowError, ValueError):
+                # Serial beyond datetime's range; the raw number is left for the date parser to reject
+                return float(text)
+        if '.' in text or 'E' in text or 'e' in text:
+            return float(text)
+        return int(text)
+
+class DateParser:
+    """Detects the Date/Time layout from a sample once, then parses the column with a compiled pattern"""
+    
+    SAMPLE_SIZE = 200
+    MEMO_LIMIT = 100000
+    MIN_DATE = date(2000, 1, 1)
+    EXCEL_EPOCH = date(1899, 12, 30)
+    
+    # (name, pattern, group order) - tried in order, first layout matching every sample wins
+    LAYOUTS = [
+        ('iso', r'(\d{4})-(\d{1,2})-(\d{1,2})', ('y', 'm', 'd')),
+        ('ymd_slash', r'(\d{4})/(\d{1,2})/(\d{1,2})', ('y', 'm', 'd')),
+        ('mdy_slash', r'(\d{1,2})/(\d{1,2})/(\d{4})', ('m', 'd', 'y')),
+        ('dmy_slash', r'(\d{1,2})/(\d{1,2})/(\d{4})', ('d', 'm', 'y')),
+        ('ymd_dot', r'(\d{4})\.(\d{1,2})\.(\d{1,2})', ('y', 'm', 'd')),
+        ('dmy_dot', r'(\d{1,2})\.(\d{1,2})\.(\d{4})', ('d', 'm', 'y')),
+        ('dmy_dash', r'(\d{1,2})-(\d{1,2})-(\d{4})', ('d', 'm', 'y')),
+        ('ymd_compact', r'(\d{4})(\d{2})(\d{2})', ('y', 'm', 'd')),
+    ]
+    
+    def __init__(self, sample_values=()):
+        self.max_date = datetime.now().date()
+        self.memo = {}
+        self.layout = self._detect_layout([v for v in sample_values if isinstance(v, str) and v.strip()])
+        
+        name, pattern, order = self.layout
+        self.pattern = re.compile(pattern)
+        self.year_group = order.index('y') + 1
+        self.month_group = order.index('m') + 1
+        self.day_group = order.index('d') + 1
+    
+    def _detect_layout(self, samples):
+        if not samples:
+            return self.LAYOUTS[0]
+        
+        for layout in self.LAYOUTS:
+            if all(self._parse_with(layout, value) for value in samples):
+                return layout
+        
+        return self.LAYOUTS[0]
+    
+    def _parse_with(self, layout, value):
+        name, pattern, order = layout
+        match = re.match(pattern, value.strip())
+        if not match:
+            return None
+        parts = dict(zip(order, (int(group) for group in match.groups())))
+        try:
+            return date(parts['y'], parts['m'], parts['d'])
+        except ValueError:
+            return None
+    
+    def parse(self, value):
+        """Trade date within bounds, or None"""
+        if isinstance(value, datetime):
+            parsed = value.date()
+        elif isinstance(value, date):
+            parsed = value
+        elif isinstance(value, str):
+            return self._parse_string(value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            try:
+                parsed = self.EXCEL_EPOCH + timedelta(days=int(value))
+            except (OverflowError, ValueError):
+                return None
+        else:
+            return None
+        
+        if parsed > self.max_date or parsed < self.MIN_DATE:
+            return None
+        return parsed
+    
+    def _parse_string(self, value):
+        key = value.lstrip().partition(' ')[0].partition('T')[0]
+        try:
+            return self.memo[key]
+        except KeyError:
+            pass
+        
+        parsed = self._match_date(key)
+        if parsed is not None and (parsed > self.max_date or parsed < self.MIN_DATE):
+            parsed = None
+        
+        if len(self.memo) >= self.MEMO_LIMIT:
+            self.memo.clear()
+        self.memo[key] = parsed
+        return parsed
+    
+    def _match_date(self, key):
+        match = self.pattern.match(key)
+        if not match:
+            return None
+        try:
+            return date(int(match.group(self.year_group)),
+                        int(match.group(self.month_group)),
+                        int(match.group(self.day_group)))
+        except ValueError:
+            return None
+    
+    def skip_reason(self, value):
+        """Why parse() rejected value: 'future_date', 'date_before_2000' or 'unparsable_date'"""
+        if isinstance(value, datetime):
+            parsed = value.date()
+        elif isinstance(value, date):
+            parsed = value
+        elif isinstance(value, str):
+            parsed = self._match_date(value.lstrip().partition(' ')[0].partition('T')[0])
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            try:
+                parsed = self.EXCEL_EPOCH + timedelta(days=int(value))
+            except (OverflowError, ValueError):
+                parsed = None
+        else:
+            parsed = None
+        
+        if parsed is None:
+            return 'unparsable_date'
+        return 'future_date' if parsed > self.max_date else 'date_before_2000'
+
+TRADE_IMPORTERS = []
+
+def register_importer(importer_class):
+    """Add an import format; formats are offered each file in registration order"""
+    TRADE_IMPORTERS.append(importer_class)
+    return importer_class
+
+class TradeImporter:
+    """An import format: detect() claims a file, open() locates its rows and columns, iter_batches() streams trades"""
+    
+    name = "Trade export"
+    label = "file"
+    fallback = None
+    rows_per_second = 100000
+    
+    def __init__(self, processor):
+        self.processor = processor
+        self.config = processor.config
+        self.sheet_name = None
+        self.column_names = {}
+        self.row_count = None
+    
+    @classmethod
+    def detect(cls, config, sample):
+        """Whether this format claims a file, judged from its first 64 KB"""
+        return False
+    
+    @classmethod
+    def probe(cls, config, source, sample):
+        """Whether this format claims an ExportSource; formats that must look inside a container override this"""
+        return cls.detect(config, sample)
+    
+    def columns(self):
+        """Column key -> header name (or list of accepted names)"""
+        return self.config.get("excel_columns", {})
+    
+    def open(self, source, progress_callback=None):
+        """(rows, headers, total_rows) for the ExportSource's trades; total_rows may be None"""
+        raise NotImplementedError
+    
+    def tail_rows(self, source, headers, count):
+        """The last count data rows after open(), or [] when the format cannot reach them cheaply; may set row_count"""
+        return []
+    
+    def _name_columns(self, header_row, headers):
+        self.column_names = {key: str(header_row[index]).strip() for key, index in headers.items()}
+    
+    def close(self):
+        pass
+    
+    def iter_batches(self, source, progress_callback=None):
+        """Stream the ExportSource's trades as TradeTable batches"""
+        try:
+            rows, headers, total_rows = self.open(source, progress_callback)
+            resume = self.processor.resume
+            if resume:
+                if progress_callback:
+                    progress_callback(f"Resuming from checkpoint: skipping {resume['rows_parsed']:,} parsed rows...")
+                rows = self.skip_rows(rows, headers, resume['rows_parsed'])
+            yield from self.processor.parse_rows(rows, headers, total_rows, progress_callback)
+        finally:
+            self.close()
+    
+    def skip_rows(self, rows, headers, count):
+        """rows advanced past count data rows, for resuming from a checkpoint"""
+        for _ in islice(rows, count):
+            pass
+        return rows
+
+class ReportTableParser(HTMLParser):
+    """Incremental HTML tokenizer that collects table rows as lists of cell text, never building a DOM"""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self.row = None
+        self.cell = None
+        self.colspan = 1
+    
+    def handle_starttag(self, tag, attrs):
+        if tag == 'tr':
+            self._end_row()
+            self.row = []
+        elif tag in ('td', 'th'):
+            self._end_cell()
+            if self.row is None:
+                self.row = []
+            self.cell = []
+            colspan = dict(attrs).get('colspan') or ''
+            self.colspan = int(colspan) if colspan.isdigit() else 1
+        elif tag == 'br' and self.cell is not None:
+            self.cell.append(' ')
+    
+    def handle_endtag(self, tag):
+        if tag in ('td', 'th'):
+            self._end_cell()
+        elif tag in ('tr', 'table'):
+            self._end_row()
+    
+    def handle_data(self, data):
+        if self.cell is not None:
+            self.cell.append(data)
+    
+    def take_rows(self):
+        rows, self.rows = self.rows, []
+        return rows
+    
+    def _end_cell(self):
+        if self.cell is None:
+            return
+        self.row.append(' '.join(''.join(self.cell).split()))
+        self.row.extend([''] * (self.colspan - 1))
+        self.cell = None
+    
+    def _end_row(self):
+        self._end_cell()
+        if self.row:
+            self.rows.append(self.row)
+        self.row = None
+
+class MetaTraderReportImporter(TradeImporter):
+    """MetaTrader strategy tester and trade history reports: finds the deals table and keeps closing deals"""
+    
+    label = "MetaTrader report"
+    rows_per_second = 6000
+    REPORT_TITLES = ("strategy tester", "trade history report")
+    CLOSING_DIRECTIONS = {'out', 'in/out', 'out by'}
+    NON_TRADE_TYPES = {'balance', 'credit', 'deposit', 'withdrawal', 'correction', 'bonus', 'charge'}
+    
+    def __init__(self, processor):
+        super().__init__(processor)
+        self.report_rows = None
+    
+    def columns(self):
+        return self.config.get("metatrader_columns", {})
+    
+    def iter_report_rows(self, source):
+        """Every table row of the report as a sequence of cell values"""
+        raise NotImplementedError
+    
+    def open(self, source, progress_callback=None):
+        processor = self.processor
+        
+        if progress_callback:
+            progress_callback("Opening MetaTrader report...")
+        
+        processor.profiler.begin('open')
+        rows = self.report_rows = self.iter_report_rows(source)
+        
+        if progress_callback:
+            progress_callback("Scanning for the deals table...")
+        
+        processor.profiler.begin('header_analysis')
+        for row in rows:
+            columns = self._map_deal_columns(row)
+            if columns:
+                break
+        else:
+            raise ValueError("Could not find a deals table with Time and Profit columns")
+        
+        if progress_callback:
+            progress_callback(f"Found deals table ({len(columns)} known columns)")
+        self._name_columns(row, columns)
+        
+        return self._iter_deals(rows, columns), {'datetime': 0, 'pnl': 1, 'trade_num': 2}, None
+    
+    def _map_deal_columns(self, row):
+        """Column key -> index when row is a deals header, else None"""
+        cells = [self._text(value) for value in row]
+        columns = {}
+        for key, names in self.columns().items():
+            for name in ([names] if isinstance(names, str) else names):
+                if name in cells:
+                    # Position reports list the open Time before the close Time, so take the last
+                    columns[key] = len(cells) - 1 - cells[::-1].index(name)
+                    break
+        return columns if 'datetime' in columns and 'pnl' in columns else None
+    
+    def _iter_deals(self, rows, columns):
+        """(time, net P&L, ticket) rows for closing deals until the table ends"""
+        time_col = columns['datetime']
+        pnl_col = columns['pnl']
+        
+        for row in rows:
+            if len(row) <= time_col or not self._text(row[time_col]):
+                return
+            
+            if self._cell(row, columns.get('type')).lower() in self.NON_TRADE_TYPES:
+                continue
+            if 'direction' in columns and self._cell(row, columns['direction']).lower() not in self.CLOSING_DIRECTIONS:
+                continue
+            
+            profit = row[pnl_col] if len(row) > pnl_col else None
+            if not self._text(profit):
+                continue
+            
+            pnl = self._number(profit)
+            if pnl is None:
+                pnl = profit
+            else:
+                for key in ('commission', 'swap'):
+                    pnl += self._number(self._cell(row, columns.get(key))) or 0.0
+            
+            yield self._deal_time(row[time_col]), pnl, self._cell(row, columns.get('trade_num')) or None
+    
+    def _deal_time(self, value):
+        return value
+    
+    def _cell(self, row, col):
+        return self._text(row[col]) if col is not None and col < len(row) else ''
+    
+    @staticmethod
+    def _text(value):
+        return str(value).strip() if value is not None else ''
+    
+    @staticmethod
+    def _number(value):
+        """MetaTrader amounts use spaces as thousands separators"""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        text = str(value).replace(' ', '').replace('\xa0', '') if value is not None else ''
+        try:
+            return float(text)
+        except ValueError:
+            return None
+    
+    def close(self):
+        if self.report_rows is not None:
+            self.report_rows.close()
+
+@register_importer
+class MetaTraderXlsxImporter(MetaTraderReportImporter):
+    """MetaTrader reports saved as .xlsx, read through the XML stream reader"""
+    
+    name = "MetaTrader XLSX"
+    rows_per_second = 20000
+    TITLE_SCAN_ROWS = 20
+    
+    def __init__(self, processor):
+        super().__init__(processor)
+        self.reader = None
+    
+    @classmethod
+    def probe(cls, config, source, sample):
+        if not sample.startswith(b'PK\x03\x04'):
+            return False
+        
+        try:
+            reader = XlsxTradesReader(source.seekable())
+        except Exception:
+            return False
+        try:
+            if not reader.sheetnames:
+                return False
+            rows = reader.iter_rows(reader.sheetnames[0])
+            try:
+                return any(isinstance(value, str) and value.strip().lower().startswith(cls.REPORT_TITLES)
+                           for row in islice(rows, cls.TITLE_SCAN_ROWS) for value in row)
+            finally:
+                rows.close()
+        except Exception:
+            return False
+        finally:
+            reader.close()
+    
+    def iter_report_rows(self, source):
+        self.reader = XlsxTradesReader(source.seekable())
+        return self.reader.iter_rows(self.reader.sheetnames[0])
+    
+    def _deal_time(self, value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return self.reader.epoch + timedelta(days=float(value))
+        return value
+    
+    def close(self):
+        super().close()
+        if self.reader is not None:
+            self.reader.close()
+
+@register_importer
+class MetaTraderHtmlImporter(MetaTraderReportImporter):
+    """MetaTrader HTML reports, tokenized a chunk at a time so memory stays flat on 100 MB+ files"""
+    
+    name = "MetaTrader HTML"
+    CHUNK_CHARS = 1024 * 1024
+    
+    @staticmethod
+    def sniff_encoding(sample):
+        """MetaTrader 5 writes UTF-16 reports; MetaTrader 4 declares a legacy charset"""
+        if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return 'utf-16'
+        if sample.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        if sample[1:2] == b'\x00':
+            return 'utf-16-le'
+        
+        declared = re.search(rb'charset=["\']?([\w-]+)', sample[:4096], re.IGNORECASE)
+        if declared:
+            try:
+                return codecs.lookup(declared.group(1).decode('ascii')).name
+            except LookupError:
+                pass
+        return 'utf-8'
+    
+    @classmethod
+    def detect(cls, config, sample):
+        text = sample.decode(cls.sniff_encoding(sample), errors='ignore').lstrip('\ufeff \t\r\n').lower()
+        return text.startswith('<') and ('<html' in text or '<table' in text)
+    
+    def iter_report_rows(self, source):
+        encoding = self.sniff_encoding(source.sample())
+        
+        parser = ReportTableParser()
+        with io.TextIOWrapper(source.open(), encoding=encoding, errors='replace', newline='') as f:
+            for chunk in iter(lambda: f.read(self.CHUNK_CHARS), ''):
+                parser.feed(chunk)
+                yield from parser.take_rows()
+            parser.close()
+            yield from parser.take_rows()
+
+@register_importer
+class TradingViewXlsxImporter(TradeImporter):
+    """TradingView .xlsx exports through the direct XML stream reader"""
+    
+    name = "TradingView XLSX"
+    label = "Excel file"
+    fallback = "TradingView XLSX (openpyxl)"
+    rows_per_second = 25000
+    
+    def __init__(self, processor):
+        super().__init__(processor)
+        self.reader = None
+    
+    @classmethod
+    def detect(cls, config, sample):
+        return sample.startswith(b'PK\x03\x04') and config.get("import", {}).get("fast_xlsx_reader", True)
+    
+    def open(self, source, progress_callback=None):
+        processor = self.processor
+        
+        if progress_callback:
+            progress_callback("Opening Excel file...")
+        
+        processor.profiler.begin('open')
+        self.reader = XlsxTradesReader(source.seekable())
+        
+        if progress_callback:
+            progress_callback("Scanning for trading data sheets...")
+        
+        processor.profiler.begin('sheet_discovery')
+        sheet_name = processor._match_trades_sheet(self.reader.sheetnames, progress_callback)
+        if not sheet_name:
+            raise ValueError("Could not find trading data sheet")
+        
+        if progress_callback:
+            progress_callback("Analyzing column headers...")
+        
+        processor.profiler.begin('header_analysis')
+        first_row = next(self.reader.iter_rows(sheet_name), None)
+        if first_row is None:
+            raise ValueError("Trading data sheet is empty")
+        headers = processor._map_header_row(first_row, progress_callback, self.columns())
+        self.sheet_name = sheet_name
+        self._name_columns(first_row, headers)
+        
+        # The declared dimension is only a progress estimate; some writers leave a stale "A1"
+        max_row = self.reader.max_row(sheet_name)
+        total_rows = max_row - 1 if max_row and max_row > 1 else None
+        
+        rows = self.reader.iter_rows(sheet_name,
+                                     min_row=2,
+                                     columns=set(headers.values()),
+                                     date_columns={headers['datetime']})
+        return rows, headers, total_rows
+    
+    def skip_rows(self, rows, headers, count):
+        # Restart the sheet stream past the parsed rows so their cells are never decoded
+        rows.close()
+        return self.reader.iter_rows(self.sheet_name,
+                                     min_row=2 + count,
+                                     columns=set(headers.values()),
+                                     date_columns={headers['datetime']})
+    
+    def tail_rows(self, source, headers, count):
+        rows = self.reader.tail_rows(self.sheet_name, count,
+                                     min_row=2,
+                                     columns=set(headers.values()),
+                                     date_columns={headers['datetime']})
+        if self.reader.last_row_number:
+            self.row_count = self.reader.last_row_number - 1
+        return rows
+    
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+
+@register_importer
+class TradingViewWorkbookImporter(TradeImporter):
+    """TradingView workbooks through openpyxl; slower, but copes with files the stream reader cannot"""
+    
+    name = "TradingView XLSX (openpyxl)"
+    label = "Excel file"
+    rows_per_second = 10000
+    
+    def __init__(self, processor):
+        super().__init__(processor)
+        self.wb = None
+    
+    @classmethod
+    def detect(cls, config, sample):
+        return sample.startswith(b'PK\x03\x04') or sample.startswith(b'\xd0\xcf\x11\xe0')
+    
+    def open(self, source, progress_callback=None):
+        processor = self.processor
+        
+        if progress_callback:
+            progress_callback("Opening Excel file...")
+        
+        processor.profiler.begin('open')
+        self.wb = openpyxl.load_workbook(source.seekable(), read_only=True, data_only=True, keep_links=False)
+        
+        if progress_callback:
+            progress_callback("Scanning for trading data sheets...")
+        
+        processor.profiler.begin('sheet_discovery')
+        sheet_name = processor._match_trades_sheet(self.wb.sheetnames, progress_callback)
+        if not sheet_name:
+            raise ValueError("Could not find trading data sheet")
+        sheet = self.wb[sheet_name]
+        
+        if progress_callback:
+            progress_callback("Analyzing column headers...")
+        
+        processor.profiler.begin('header_analysis')
+        first_row = list(sheet.iter_rows(min_row=1, max_row=1, values_only=True))[0]
+        headers = processor._map_header_row(first_row, progress_callback, self.columns())
+        self.sheet_name = sheet_name
+        self._name_columns(first_row, headers)
+        
+        return sheet.iter_rows(min_row=2, values_only=True), headers, self._estimate_row_count(sheet)
+    
+    def _estimate_row_count(self, sheet):
+        """Data row count from the sheet's declared dimension, None if undeclared"""
+        max_row = getattr(sheet, 'max_row', None)
+        if max_row is None:
+            return None
+        return max(0, max_row - 1)
+    
+    def close(self):
+        if self.wb is not None:
+            self.wb.close()
+
+class DelimitedTextImporter(TradeImporter):
+    """Shared reading for CSV-style exports: buffered or memory-mapped lines, sniffed delimiter"""
+    
+    label = "CSV file"
+    rows_per_second = 300000
+    TAIL_BYTES_PER_ROW = 512
+    
+    @classmethod
+    def detect(cls, config, sample):
+        return not (sample.startswith(b'PK\x03\x04') or sample.startswith(b'\xd0\xcf\x11\xe0'))
+    
+    @staticmethod
+    def sniff_dialect(sample):
+        text = sample.decode('utf-8', errors='ignore').lstrip('\ufeff')
+        try:
+            return csv.Sniffer().sniff(text, delimiters=',;\t')
+        except csv.Error:
+            return csv.excel
+    
+    @classmethod
+    def header_row(cls, sample):
+        first_line = sample.split(b'\n', 1)[0].rstrip(b'\r')
+        text = first_line.decode('utf-8', errors='ignore').lstrip('\ufeff')
+        return [cell.strip() for cell in next(csv.reader([text], cls.sniff_dialect(sample)), [])]
+    
+    def open(self, source, progress_callback=None):
+        processor = self.processor
+        file_size = source.size
+        
+        if progress_callback:
+            progress_callback("Opening CSV file...")
+        
+        processor.profiler.begin('open')
+        sample = source.sample()
+        
+        lines = self._iter_lines(source, file_size)
+        reader = csv.reader(lines, self.sniff_dialect(sample))
+        
+        first_row = next(reader, None)
+        if not first_row:
+            raise ValueError("CSV file is empty")
+        
+        if progress_callback:
+            progress_callback("Analyzing column headers...")
+        
+        processor.profiler.begin('header_analysis')
+        headers = processor._map_header_row(first_row, progress_callback, self.columns())
+        self._name_columns(first_row, headers)
+        
+        return reader, headers, self._estimate_row_count(sample, file_size)
+    
+    def tail_rows(self, source, headers, count):
+        tail = source.tail_bytes((count + 1) * self.TAIL_BYTES_PER_ROW)
+        # The first line is either cut off or, when the window reaches the file start, the header
+        lines = [line for line in list(self._decode_lines(tail.splitlines(keepends=True)))[1:] if line.strip()]
+        return list(csv.reader(lines[-count:], self.sniff_dialect(source.sample())))
+    
+    def _iter_lines(self, source, file_size):
+        """Yield decoded lines, memory-mapping plain files above the configured threshold"""
+        mmap_threshold = self.config.get("import", {}).get("csv_mmap_threshold", 256 * 1024 * 1024)
+        
+        with source.open() as f:
+            if not source.compression and file_size >= mmap_threshold:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    source = iter(mm.readline, b'')
+                    yield from self._decode_lines(source)
+            else:
+                yield from self._decode_lines(f)
+    
+    def _decode_lines(self, source):
+        first = True
+        for raw_line in source:
+            line = raw_line.decode('utf-8', errors='replace')
+            if first:
+                line = line.lstrip('\ufeff')
+                first = False
+            yield line
+    
+    def _estimate_row_count(self, sample, file_size):
+        """Extrapolate the data row count from the line density of the first block"""
+        line_count = sample.count(b'\n')
+        if len(sample) >= file_size:
+            if sample and not sample.endswith(b'\n'):
+                line_count += 1
+            return max(0, line_count - 1)
+        if line_count == 0:
+            return None
+        return max(1, int(file_size / (len(sample) / line_count)) - 1)
+
+@register_importer
+class BrokerCsvImporter(DelimitedTextImporter):
+    """Broker statement CSVs, matched by the header aliases in DEFAULT_CONFIG['broker_csv_columns']"""
+    
+    name = "Broker CSV"
+    
+    @classmethod
+    def detect(cls, config, sample):
+        if not super().detect(config, sample):
+            return False
+        header = set(cls.header_row(sample))
+        aliases = config.get("broker_csv_columns", {})
+        return all(header & set(aliases.get(key, ())) for key in ('datetime', 'pnl'))
+    
+    def columns(self):
+        return self.config.get("broker_csv_columns", {})
+
+@register_importer
+class TradingViewCsvImporter(DelimitedTextImporter):
+    """TradingView "List of trades" CSV exports; also the catch-all for unrecognised text files"""
+    
+    name = "TradingView CSV"
+
+class TradeProcessor:
+    
+    CANCEL_CHECK_ROWS = 10000
+    BATCH_SIZE = 65536
+    PARTIAL_BATCH_SIZE = 16384
+    PEEK_ROWS = 200
+    
+    def __init__(self, config=None):
+        self.config = config or DEFAULT_CONFIG
+        self.trades = TradeTable()
+        self.daily_pnl = defaultdict(float)
+        self.stats = {}
+        self.date_parser = DateParser()
+        self.dedupe_index = None
+        self.cancel_event = None
+        self.partial_callback = None
+        self.sheet_name = None
+        self.archive_member = None
+        self.checkpoint = None
+        self.resume = None
+        self.importer_name = None
+        self.rows_parsed = 0
+        self.cumulative_chunks = []
+        self.profiler = ImportProfiler()
+    
+    def process_file(self, file_path, progress_callback=None):
+        self.profiler = ImportProfiler(self.config.get("import", {}).get("profile_memory", False))
+        try:
+            return self._process_by_format(file_path, progress_callback)
+        finally:
+            self.profiler.finish()
+    
+    def _process_by_format(self, file_path, progress_callback=None):
+        with self.open_source(file_path, progress_callback) as source:
+            importer_class = self.detect_importer(source)
+            
+            while True:
+                try:
+                    return self.import_source(importer_class, source, progress_callback)
+                except ImportCancelled:
+                    raise
+                except Exception as e:
+                    fallback = self._importer_named(importer_class.fallback)
+                    if fallback is None:
+                        raise RuntimeError(f"Error processing {importer_class.label}: {str(e)}") from e
+                    if progress_callback:
+                        progress_callback(f"{importer_class.name} reader failed ({e}), retrying with {fallback.name}...")
+                    # The report covers the retry alone, not the failed attempt's stages and skips
+                    self.profiler.finish()
+                    self.profiler = ImportProfiler(self.profiler.track_memory)
+                    # Likewise the live preview drops the partials the failed attempt already sent
+                    if self.partial_callback:
+                        self.partial_callback({'reset': True})
+                    importer_class = fallback
+    
+    def open_source(self, file_path, progress_callback=None):
+        """ExportSource for a file; a zip bundle is pointed at the export holding the trades"""
+        source = ExportSource(file_path, self.config)
+        if source.compression == 'zip':
+            source.select(self.archive_member or self.select_archive_member(source))
+            if progress_callback:
+                progress_callback(f"Reading {source.member} from {os.path.basename(file_path)}")
+        return source
+    
+    def select_archive_member(self, source):
+        """The bundle's trades export: the largest member a registered format recognizes"""
+        members = source.members()
+        if not members:
+            raise ValueError("Archive holds no trade exports")
+        
+        recognized = [member for member in members if self._recognizes_member(source, member)]
+        with zipfile.ZipFile(source.path) as archive:
+            return max(recognized or members[:1], key=lambda member: archive.getinfo(member).file_size)
+    
+    def _recognizes_member(self, source, member):
+        source.select(member)
+        try:
+            importer_class = self.detect_importer(source)
+        except (ValueError, zipfile.BadZipFile):
+            return False
+        
+        if issubclass(importer_class, DelimitedTextImporter):
+            # Every text file passes as CSV, so also require the trade columns in its header
+            try:
+                self._map_header_row(importer_class.header_row(source.sample()), None, importer_class(self).columns())
+            except ValueError:
+                return False
+        return True
+    
+    def detect_importer(self, source):
+        """First registered import format that claims the ExportSource"""
+        sample = source.sample()
+        
+        for importer_class in TRADE_IMPORTERS:
+            if importer_class.probe(self.config, source, sample):
+                return importer_class
+        raise ValueError("Unrecognized trade export format")
+    
+    def _importer_named(self, name):
+        return next((importer_class for importer_class in TRADE_IMPORTERS if importer_class.name == name), None)
+    
+    def process_with_importer(self, importer_class, file_path, progress_callback=None):
+        with self.open_source(file_path, progress_callback) as source:
+            return self.import_source(importer_class, source, progress_callback)
+    
+    def import_source(self, importer_class, source, progress_callback=None):
+        callback = progress_callback if source.size >= 1024 * 1024 else None
+        self.importer_name = importer_class.name
+        self.resume = self._load_checkpoint(importer_class)
+        
+        batches = importer_class(self).iter_batches(source, callback)
+        try:
+            self._ingest_batches(batches, callback)
+        except ImportCancelled:
+            self._discard_checkpoint()
+            raise
+        finally:
+            batches.close()
+            self.resume = None
+        
+        self.calculate_stats()
+        self._discard_checkpoint()
+        
+        return self._build_result()
+    
+    def _load_checkpoint(self, importer_class):
+        """Checkpointed state to resume from, if the checkpoint was written by this import format"""
+        if self.checkpoint is None:
+            return None
+        state = self.checkpoint.load()
+        if state is None or state['importer'] != importer_class.name:
+            return None
+        return state
+    
+    def _save_checkpoint(self, chunks):
+        if self.checkpoint is None or not self.checkpoint.due():
+            return
+        try:
+            self.checkpoint.save(self.importer_name, self.rows_parsed, TradeTable.concatenate(chunks),
+                                 self.profiler.skipped)
+        except (IOError, OSError) as e:
+            print(f"Error writing import checkpoint: {e}")
+    
+    def _discard_checkpoint(self):
+        if self.checkpoint is not None:
+            self.checkpoint.discard()
+    
+    def import_file(self, file_path, progress_callback=None):
+        """Process a file, in a child process when isolation is enabled and the file is big enough to matter"""
+        import_config = self.config.get("import", {})
+        if (import_config.get("isolated_process", True)
+                and os.path.getsize(file_path) >= import_config.get("isolated_process_min_bytes", 1024 * 1024)):
+            return self.process_file_isolated(file_path, progress_callback)
+        return self.process_file(file_path, progress_callback)
+    
+    def process_file_isolated(self, file_path, progress_callback=None):
+        """Run process_file in a child process, which is killed outright if the import is cancelled"""
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        dedupe_payload = self.dedupe_index.to_bytes() if self.dedupe_index is not None else None
+        checkpoint_path = self.checkpoint.path if self.checkpoint is not None else None
+        process = multiprocessing.Process(target=isolated_import_worker,
+                                          args=(file_path, self.config, sender, dedupe_payload,
+                                                self.partial_callback is not None, checkpoint_path),
+                                          daemon=True)
+        process.start()
+        sender.close()
+        
+        finished = False
+        cancelled = False
+        try:
+            while not finished:
+                if self.cancel_event is not None and self.cancel_event.is_set():
+                    cancelled = True
+                    raise ImportCancelled("Import cancelled")
+                if not receiver.poll(0.1):
+                    continue
+                
+                try:
+                    kind, payload = receiver.recv()
+                except EOFError:
+                    raise RuntimeError("Import process exited unexpectedly")
+                
+                if kind == 'progress':
+                    if progress_callback:
+                        progress_callback(payload)
+                elif kind == 'partial':
+                    self.partial_callback(payload)
+                elif kind == 'error':
+                    raise RuntimeError(payload)
+                else:
+                    finished = True
+        finally:
+            if not finished:
+                process.kill()
+            process.join()
+            receiver.close()
+            if cancelled:
+                # Only once the child is dead, so it cannot write the checkpoint again
+                self._discard_checkpoint()
+        
+        result, profile = unpack_import_result(payload)
+        self.profiler = ImportProfiler.from_report(profile) if profile else ImportProfiler()
+        self.trades = result['trades']
+        self.daily_pnl = defaultdict(float, result['daily_pnl'])
+        self.stats = result['stats']
+        
+        return result
+    
+    def process_workbook(self, file_path, progress_callback=None):
+        return self.process_with_importer(TradingViewWorkbookImporter, file_path, progress_callback)
+    
+    def process_xlsx_stream(self, file_path, progress_callback=None):
+        return self.process_with_importer(TradingViewXlsxImporter, file_path, progress_callback)
+    
+    def process_csv_file(self, file_path, progress_callback=None):
+        return self.process_with_importer(TradingViewCsvImporter, file_path, progress_callback)
+    
+    def _build_result(self):
+        return {
+            'trades': self.trades,
+            'daily_pnl': dict(self.daily_pnl),
+            'stats': self.stats
+        }
+    
+    def detect_file_format(self, file_path):
+        """Identify the export format from the file signature rather than its extension"""
+        with open(file_path, 'rb') as f:
+            signature = f.read(8)
+        
+        if signature.startswith(b'PK\x03\x04'):
+            return 'xlsx'
+        if signature.startswith(b'\xd0\xcf\x11\xe0'):
+            return 'xls'
+        return 'csv'
+    
+    def _match_trades_sheet(self, available_names, progress_callback=None):
+        if self.sheet_name:
+            return self.sheet_name if self.sheet_name in available_names else None
+        
+        matches = self._match_trades_sheets(available_names)
+        if not matches:
+            return None
+        
+        if progress_callback:
+            progress_callback(f"Found sheet: '{matches[0]}'")
+        return matches[0]
+    
+    def _match_trades_sheets(self, available_names):
+        sheet_names = [name.lower() for name in self.config.get("sheet_names", ["List of trades"])]
+        return [sheet_name for sheet_name in available_names
+                if any(target_name in sheet_name.lower() for target_name in sheet_names)]
+    
+    def find_trades_sheets(self, file_path):
+        """Every trades sheet in an .xlsx workbook; combined workbooks hold one per instrument"""
+        if self.detect_file_format(file_path) != 'xlsx':
+            return []
+        
+        try:
+            reader = XlsxTradesReader(file_path)
+        except Exception:
+            return []
+        try:
+            return self._match_trades_sheets(reader.sheetnames)
+        finally:
+            reader.close()
+    
+    def process_sheet(self, file_path, sheet_name, progress_callback=None):
+        """Process one named trades sheet instead of the first match"""
+        self.sheet_name = sheet_name
+        try:
+            return self.process_file(file_path, progress_callback)
+        finally:
+            self.sheet_name = None
+    
+    def peek(self, file_path, row_count=None):
+        """Preview an export from its first and last rows: format, columns, date range and import estimates"""
+        row_count = row_count or self.PEEK_ROWS
+        started = time.perf_counter()
+        scratch = TradeProcessor(self.config)
+        scratch.sheet_name = self.sheet_name
+        scratch.archive_member = self.archive_member
+        
+        with scratch.open_source(file_path) as source:
+            importer_class = scratch.detect_importer(source)
+            while True:
+                importer = importer_class(scratch)
+                try:
+                    rows, headers, total_rows = importer.open(source)
+                    head = list(islice(rows, row_count))
+                    tail = importer.tail_rows(source, headers, row_count)
+                    if total_rows is None:
+                        total_rows = importer.row_count
+                    break
+                except Exception as e:
+                    fallback = self._importer_named(importer_class.fallback)
+                    if fallback is None:
+                        raise RuntimeError(f"Error previewing {importer_class.label}: {str(e)}") from e
+                    importer_class = fallback
+                finally:
+                    importer.close()
+            source_name = source.name
+        
+        head_trades, skipped = self._peek_trades(head, headers)
+        tail_trades, _ = self._peek_trades(tail, headers)
+        sample = TradeTable.concatenate([head_trades, tail_trades])
+        
+        date_range = None
+        if len(sample):
+            date_range = (date.fromordinal(int(sample.dates.min())).isoformat(),
+                          date.fromordinal(int(sample.dates.max())).isoformat())
+        
+        estimated_trades = None
+        estimated_import_s = None
+        if total_rows is not None:
+            estimated_trades = int(total_rows * len(head_trades) / len(head)) if head else 0
+            estimated_import_s = total_rows / importer_class.rows_per_second
+        
+        return {
+            'file': source_name,
+            'format': importer_class.name,
+            'sheet': importer.sheet_name,
+            'columns': importer.column_names,
+            'estimated_rows': total_rows,
+            'estimated_trades': estimated_trades,
+            'estimated_import_s': estimated_import_s,
+            'date_range': date_range,
+            'first_rows': [self._peek_row(row, headers) for row in head],
+            'last_rows': [self._peek_row(row, headers) for row in tail],
+            'skipped': skipped,
+            'peek_s': time.perf_counter() - started
+        }
+    
+    def _peek_trades(self, rows, headers):
+        """Run sample rows through the real parser; (TradeTable, skip reasons)"""
+        if not rows:
+            return TradeTable(), {}
+        parser = TradeProcessor(self.config)
+        trades = TradeTable.concatenate(parser.parse_rows(rows, headers, len(rows)))
+        return trades, dict(parser.profiler.skipped)
+    
+    def _peek_row(self, row, headers):
+        return {key: row[index] if index < len(row) else None for key, index in headers.items()}
+    
+    @staticmethod
+    def format_preview(preview, sample_rows=3):
+        """Dialog lines for a peek() preview"""
+        location = f", sheet '{preview['sheet']}'" if preview['sheet'] else ""
+        lines = [f"{preview['file']}: {preview['format']}{location}",
+                 "Columns: " + ", ".join(f"{key} = {name}" for key, name in preview['columns'].items())]
+        
+        if preview['estimated_rows'] is not None:
+            lines.append(f"Estimated size: {preview['estimated_rows']:,} rows, ~{preview['estimated_trades']:,} trades")
+            lines.append(f"Estimated import time: {preview['estimated_import_s']:.1f}s")
+        if preview['date_range']:
+            partial = "" if preview['last_rows'] else " (first rows only)"
+            lines.append(f"Date range: {preview['date_range'][0]} to {preview['date_range'][1]}{partial}")
+        
+        for title, rows in (("First rows:", preview['first_rows'][:sample_rows]),
+                            ("Last rows:", preview['last_rows'][-sample_rows:])):
+            if rows:
+                lines.append(title)
+                lines.extend("  " + "  ".join(str(value) for value in row.values()) for row in rows)
+        
+        if preview['skipped']:
+            reasons = ", ".join(f"{reason} {count}" for reason, count in sorted(preview['skipped'].items()))
+            lines.append(f"Skipped in sample: {reasons}")
+        lines.append(f"Previewed in {preview['peek_s']:.2f}s")
+        return lines
+    
+    def _map_header_row(self, first_row, progress_callback=None, column_config=None):
+        headers = {}
+        if column_config is None:
+            column_config = self.config.get("excel_columns", {})
+        
+        for i, header in enumerate(first_row):
+            if header:
+                header_str = str(header).strip()
+                
+                for key, expected_names in column_config.items():
+                    if header_str == expected_names or (isinstance(expected_names, list) and header_str in expected_names):
+                        headers[key] = i
+                        if progress_callback:
+                            progress_callback(f"Found {header_str} column")
+                        break
+        
+        required_columns = ['datetime', 'pnl']
+        missing_columns = [col for col in required_columns if col not in headers]
+        
+        if missing_columns:
+            column_names = [self._column_names(column_config.get(col, col)) for col in missing_columns]
+            raise ValueError(f"Missing required columns: {', '.join(column_names)}")
+        
+        return headers
+    
+    def _column_names(self, expected_names):
+        return expected_names if isinstance(expected_names, str) else " / ".join(expected_names)
+    
+    def _ingest_batches(self, batches, progress_callback=None):
+        self.trades = TradeTable()
+        self.daily_pnl = defaultdict(float)
+        
+        chunks = [self.resume['trades']] if self.resume else []
+        if chunks and self.partial_callback:
+            self._publish_partial(chunks[0])
+        
+        for batch in batches:
+            chunks.append(batch)
+            if self.partial_callback:
+                self._publish_partial(batch)
+            self._save_checkpoint(chunks)
+        
+        self.trades = TradeTable.concatenate(chunks)
+        self.profiler.end(rows=len(self.trades) + sum(self.profiler.skipped.values()))
+        
+        self.profiler.begin('daily_aggregation')
+        self.daily_pnl = defaultdict(float, self.trades.daily_pnl())
+        self.profiler.end()
+        
+        self.profiler.begin('quality')
+        cumulative = np.concatenate(self.cumulative_chunks) if self.cumulative_chunks else None
+        self.profiler.quality = TradeQualityCheck(self.config).run(self.trades, cumulative)
+        self.profiler.end(rows=len(self.trades))
+        
+        if progress_callback:
+            progress_callback(f"Successfully processed {len(self.trades)} unique trades")
+    
+    def parse_rows(self, rows, headers, total_rows, progress_callback=None):
+        """Shared row engine for importers: parse, filter and dedupe rows into TradeTable batches"""
+        processed_trade_numbers = self.dedupe_index.copy() if self.dedupe_index is not None else set()
+        
+        if self.dedupe_index is not None and 'trade_num' not in headers:
+            raise ValueError("Append import requires a Trade # column")
+        
+        self.rows_parsed = 0
+        self.cumulative_chunks = []
+        # Resumed imports have no cumulative values for their checkpointed trades
+        has_cumulative = 'cumulative_pnl' in headers and not self.resume
+        if self.resume:
+            self.rows_parsed = self.resume['rows_parsed']
+            for reason, count in self.resume['skipped'].items():
+                self.profiler.skipped[reason] += count
+            for trade_num in self.resume['trades'].trade_nums.tolist():
+                if trade_num != TradeTable.MISSING_TRADE_NUM:
+                    processed_trade_numbers.add(trade_num)
+        
+        self.profiler.begin('row_parsing')
+        if progress_callback:
+            progress_callback("Processing trade data...")
+        rows_before = self.rows_parsed
+        
+        rows = iter(rows)
+        head = list(islice(rows, DateParser.SAMPLE_SIZE))
+        datetime_col = headers['datetime']
+        self.date_parser = DateParser([row[datetime_col] for row in head if len(row) > datetime_col])
+        rows = chain(head, rows)
+        
+        rows = self._check_cancelled(rows)
+        rows = self._track_progress(rows, total_rows, progress_callback, start=self.rows_parsed)
+        rows = self._count_parsed_rows(rows)
+        trades = self._iter_parsed_trades(rows, headers, processed_trade_numbers)
+        
+        batch_size = self.PARTIAL_BATCH_SIZE if self.partial_callback else self.BATCH_SIZE
+        while True:
+            builder = TradeTableBuilder()
+            cumulative = []
+            for trade_date, pnl, trade_num, cumulative_pnl in islice(trades, batch_size):
+                builder.append(trade_date, pnl, trade_num)
+                cumulative.append(cumulative_pnl)
+            if not len(builder):
+                if self.rows_parsed == rows_before and progress_callback:
+                    progress_callback("No data rows found")
+                return
+            if has_cumulative:
+                self.cumulative_chunks.append(np.array(cumulative, dtype=np.float64))
+            yield builder.build()
+    
+    def _publish_partial(self, chunk):
+        """Hand the aggregates of a freshly parsed batch to partial_callback"""
+        self.partial_callback({
+            'daily_pnl': chunk.daily_pnl(),
+            'trade_counts': chunk.daily_counts(),
+            'total_pnl': float(chunk.pnl.sum()),
+            'winning_trades': int(np.count_nonzero(chunk.pnl > 0)),
+            'total_trades': len(chunk)
+        })
+    
+    def _check_cancelled(self, rows):
+        """Pass rows through in batches, stopping between batches once the import is cancelled"""
+        cancel_event = self.cancel_event
+        if cancel_event is None:
+            yield from rows
             return
         
-        trades_list = []
-        daily_pnl_dict = defaultdict(float)
+        rows = iter(rows)
+        for batch in iter(lambda: list(islice(rows, self.CANCEL_CHECK_ROWS)), []):
+            if cancel_event.is_set():
+                raise ImportCancelled("Import cancelled")
+            yield from batch
+    
+    def _count_parsed_rows(self, rows):
+        """Pass rows through, keeping rows_parsed at the parser position a checkpoint resumes from"""
+        for row in rows:
+            self.rows_parsed += 1
+            yield row
+    
+    def _track_progress(self, rows, total_rows, progress_callback=None, start=0):
+        """Pass rows through unchanged while reporting progress"""
+        if not progress_callback:
+            yield from rows
+            return
         
-        if total_rows < 1000:
+        if not total_rows:
+            total_rows = None
+            progress_interval = 10000
+            show_progress = True
+        elif total_rows < 1000:
             progress_interval = max(1, total_rows // 10)
             show_progress = total_rows > 100
         else:
             progress_interval = max(1, total_rows // 100)
             show_progress = True
-        datetime_col = headers['datetime']
-        pnl_col = headers['pnl']
-        trade_num_col = headers.get('trade_num')
-        
-        if progress_callback and show_progress:
-            progress_callback("Processing trade data...")
         
-        for i, row in enumerate(all_rows):
-            if progress_callback and show_progress and i % progress_interval == 0:
-                progress = int((i / total_rows) * 100)
-                progress_callback(f"Processing trades... {progress}% ({i}/{total_rows})")
-            
-            try:
-                trade_num = row[trade_num_col] if trade_num_col is not None else None
-                datetime_val = row[datetime_col]
-                pnl_val = row[pnl_col]
-                
-                if not datetime_val or pnl_val is None:
-                    continue
-                
-                if trade_num and trade_num in processed_trade_numbers:
-                    continue
-                if isinstance(datetime_val, datetime):
-                    trade_date = datetime_val.date()
-                else:
-                    try:
-                        date_str = str(datetime_val).split()[0]
-                        trade_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                    except (ValueError, TypeError):
-                        continue
-                
-                if trade_date > datetime.now().date() or trade_date.year < 2000:
-                    continue
-                if isinstance(pnl_val, (int, float)):
-                    pnl = float(pnl_val)
-                elif isinstance(pnl_val, str):
-                    cleaned = pnl_val.replace(',', '').replace('$', '').strip()
-                    if not cleaned or cleaned == '-':
-                        continue
-                    try:
-                        pnl = float(cleaned)
-                    except ValueError:
-                        continue
+        for i, row in enumerate(rows, start):
+            if total_rows and i > total_rows:
+                # More rows than the estimate promised: switch to a running count
+                total_rows, progress_interval, show_progress = None, 10000, True
+            if show_progress and i % progress_interval == 0:
+                if total_rows:
+                    progress = min(100, int((i / total_rows) * 100))
+                    progress_callback(f"Processing trades... {progress}% ({i}/{total_rows})")
                 else:
-                    continue
-                
-                if trade_num:
-                    processed_trade_numbers.add(trade_num)
-                trade = {
-                    'date': trade_date,
-                    'pnl': pnl,
-                    'trade_num': trade_num
-                }
-                
-                trades_list.append(trade)
-                date_key = trade_date.strftime('%Y-%m-%d')
-                daily_pnl_dict[date_key] += pnl
-                
-            except (ValueError, TypeError, AttributeError):
+                    progress_callback(f"Processing trades... ({i} rows)")
+            yield row
+    
+    def _iter_parsed_trades(self, rows, headers, processed_trade_numbers):
+        """Parse, filter and dedupe rows one at a time"""
+        for row in rows:
+            try:
+                trade = self._process_single_trade(row, headers, processed_trade_numbers)
+            except (IndexError, ValueError, TypeError, AttributeError, OverflowError):
+                self.profiler.skipped['malformed_row'] += 1
                 continue
-        
-        self.trades = trades_list
-        self.daily_pnl = daily_pnl_dict
-        
-        if progress_callback:
-            progress_callback(f"Successfully processed {len(self.trades)} unique trades")
+            if trade:
+                yield trade
     
     def _process_single_trade(self, row, headers, processed_trade_numbers):
         trade_num = row[headers['trade_num']] if 'trade_num' in headers else None
+        if isinstance(trade_num, str):
+            trade_num = trade_num.strip()
+            if trade_num.isdigit():
+                trade_num = int(trade_num)
         datetime_val = row[headers['datetime']]
         pnl_val = row[headers['pnl']]
         
-        if not datetime_val or pnl_val is None:
+        if not datetime_val:
+            self.profiler.skipped['missing_date'] += 1
+            return None
+        if pnl_val is None:
+            self.profiler.skipped['missing_pnl'] += 1
             return None
         
         if trade_num and trade_num in processed_trade_numbers:
+            self.profiler.skipped['duplicate_trade_num'] += 1
             return None
         
-        trade_date = self._parse_date(datetime_val)
+        trade_date = self.date_parser.parse(datetime_val)
         if not trade_date:
+            self.profiler.skipped[self.date_parser.skip_reason(datetime_val)] += 1
             return None
         
         pnl = self._parse_pnl(pnl_val)
         if pnl is None:
+            self.profiler.skipped['unparsable_pnl'] += 1
             return None
         
         if trade_num:
             processed_trade_numbers.add(trade_num)
         
-        return {
-            'date': trade_date,
-            'pnl': pnl,
-            'trade_num': trade_num
-        }
-    
-    def _parse_date(self, datetime_val):
-        try:
-            if isinstance(datetime_val, datetime):
-                parsed_date = datetime_val.date()
-            else:
-                date_str = str(datetime_val).split()[0]
-                parsed_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            
-            if parsed_date > datetime.now().date():
-                return None
-            if parsed_date.year < 2000:
-                return None
-                
-            return parsed_date
-        except (ValueError, TypeError, AttributeError):
-            return None
+        cumulative_col = headers.get('cumulative_pnl')
+        cumulative_pnl = None
+        if cumulative_col is not None and cumulative_col < len(row):
+            cumulative_pnl = self._parse_pnl(row[cumulative_col])
+        return trade_date, pnl, trade_num, cumulative_pnl
     
     def _parse_pnl(self, pnl_val):
         try:
@@ -384,6 +3447,13 @@ class TradeProcessor:
             return None
     
     def calculate_stats(self):
+        self.profiler.begin('stats')
+        try:
+            self._calculate_stats()
+        finally:
+            self.profiler.end()
+    
+    def _calculate_stats(self):
         if not self.trades:
             self.stats = {
                 'total_pnl': 0.0,
@@ -394,14 +3464,12 @@ class TradeProcessor:
             return
         
         total_trades = len(self.trades)
-        total_pnl = 0.0
-        winning_trades = 0
-        for trade in self.trades:
-            pnl = trade['pnl']
-            total_pnl += pnl
-            if pnl > 0:
-                winning_trades += 1
+        total_pnl = float(self.trades.pnl.sum())
+        winning_trades = int(np.count_nonzero(self.trades.pnl > 0))
         
+        self._set_stats(total_pnl, winning_trades, total_trades)
+    
+    def _set_stats(self, total_pnl, winning_trades, total_trades):
         win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
         
         trading_days = sum(1 for pnl in self.daily_pnl.values() if pnl != 0)
@@ -413,11 +3481,137 @@ class TradeProcessor:
             'avg_daily': avg_daily,
             'total_trades': total_trades
         }
+    
+    def process_new_trades(self, file_path, dedupe_index, progress_callback=None):
+        """Process only the trades dedupe_index has not seen, and record them in it"""
+        self.dedupe_index = dedupe_index
+        try:
+            self.import_file(file_path, progress_callback)
+        finally:
+            self.dedupe_index = None
+        
+        self.profiler.begin('dedupe')
+        self.trades = dedupe_index.filter_new(self.trades)
+        self.daily_pnl = defaultdict(float, self.trades.daily_pnl())
+        self.calculate_stats()
+        self.profiler.finish()
+        
+        return self._build_result()
+    
+    def fold_new_trades(self, base_result, new_result):
+        """Fold newly imported trades into a stored dataset without re-aggregating its history"""
+        new_trades = new_result['trades']
+        self.trades = TradeTable.concatenate([base_result['trades'], new_trades])
+        
+        self.daily_pnl = defaultdict(float, base_result['daily_pnl'])
+        for date_key, pnl in new_result['daily_pnl'].items():
+            self.daily_pnl[date_key] += pnl
+        
+        base_stats = base_result['stats']
+        base_winning = round(base_stats['win_rate'] * base_stats['total_trades'] / 100)
+        self._set_stats(base_stats['total_pnl'] + float(new_trades.pnl.sum()),
+                        base_winning + int(np.count_nonzero(new_trades.pnl > 0)),
+                        base_stats['total_trades'] + len(new_trades))
+        
+        return self._build_result()
+    
+    def merge_sheet_results(self, sheet_results):
+        """One result for a multi-sheet workbook, keeping each sheet's own result under 'sheets'"""
+        merged = self.merge_results(list(sheet_results.values()), list(sheet_results))
+        merged['sheets'] = dict(sheet_results)
+        return merged
+    
+    def merge_results(self, results, strategy_keys=None):
+        """Combine several processed files into one dataset, counting trades repeated across a strategy's exports once"""
+        if strategy_keys is None:
+            strategy_keys = range(len(results))
+        
+        indexes = defaultdict(TradeDedupeIndex)
+        tables = [indexes[key].filter_new(result['trades']) for key, result in zip(strategy_keys, results)]
+        
+        self.trades = TradeTable.concatenate(tables).sorted_by_date()
+        self.daily_pnl = defaultdict(float, self.trades.daily_pnl())
+        
+        self.calculate_stats()
+        
+        return self._build_result()
+
+def process_file_worker(file_path, config, progress_queue=None, cancel_event=None):
+    """Process pool entry point: parse a single export in a child process"""
+    def report(message):
+        if progress_queue is not None:
+            progress_queue.put((file_path, message))
+    
+    processor = TradeProcessor(config)
+    processor.cancel_event = cancel_event
+    return processor.process_file(file_path, report)
+
+def process_sheet_worker(file_path, sheet_name, config, progress_queue=None, cancel_event=None):
+    """Process pool entry point: parse one trades sheet of a multi-instrument workbook"""
+    def report(message):
+        if progress_queue is not None:
+            progress_queue.put((sheet_name, message))
+    
+    processor = TradeProcessor(config)
+    processor.cancel_event = cancel_event
+    return processor.process_sheet(file_path, sheet_name, report)
+
+def isolated_import_worker(file_path, config, conn, dedupe_payload=None, publish_partials=False, checkpoint_path=None):
+    """Child process entry point for isolated imports: progress messages, then the packed result, over conn"""
+    processor = TradeProcessor(config)
+    if dedupe_payload is not None:
+        processor.dedupe_index = TradeDedupeIndex.from_bytes(dedupe_payload)
+    if checkpoint_path is not None:
+        processor.checkpoint = ImportCheckpoint(checkpoint_path, config.get("import", {}).get("checkpoint_interval_s", 15))
+    if publish_partials:
+        processor.partial_callback = lambda partial: conn.send(('partial', partial))
+    
+    try:
+        result = processor.process_file(file_path, lambda message: conn.send(('progress', message)))
+        conn.send(('result', pack_import_result(result, processor.profiler.report(file_path))))
+    except Exception as e:
+        conn.send(('error', str(e)))
+    finally:
+        conn.close()
+
+IMPORT_RESULT_HEADER = struct.Struct('<QI')
+
+def pack_import_result(result, profile=None):
+    """Compact binary import result: trade count, JSON stats and profile, then the raw trade columns"""
+    trades = result['trades']
+    metadata = json.dumps({'stats': result['stats'], 'profile': profile}).encode('utf-8')
+    return b''.join([
+        IMPORT_RESULT_HEADER.pack(len(trades), len(metadata)),
+        metadata,
+        trades.dates.astype('<i4').tobytes(),
+        trades.pnl.astype('<f8').tobytes(),
+        trades.trade_nums.astype('<i8').tobytes()
+    ])
+
+def unpack_import_result(payload):
+    count, metadata_size = IMPORT_RESULT_HEADER.unpack_from(payload)
+    offset = IMPORT_RESULT_HEADER.size
+    metadata = json.loads(payload[offset:offset + metadata_size])
+    offset += metadata_size
+    
+    columns = []
+    for dtype in ('<i4', '<f8', '<i8'):
+        column = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+        columns.append(column)
+        offset += column.nbytes
+    
+    trades = TradeTable(*columns)
+    return {'trades': trades, 'daily_pnl': trades.daily_pnl(), 'stats': metadata['stats']}, metadata['profile']
 
 # ================================ MAIN APPLICATION ================================
 
 class StrategyAnalyzer:
     
+    LOADING_POLL_MS = 100
+    LIVE_REFRESH_MS = 500
+    RESTORE_DETAIL_TRADES = 200000
+    PROGRESS_LINE_PATTERN = re.compile(r'(\[[^\]]*\] )?Processing trades\.\.\.')
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Strategy Analyzer")
@@ -443,26 +3637,42 @@ class StrategyAnalyzer:
             else:
                 data_dir = os.path.join(os.getcwd(), 'data')
         
-        self.data_manager = DataManager(data_dir)
+        import_config = self.config.get("import", {})
+        self.data_manager = DataManager(data_dir, import_config.get("cache_max_bytes", 256 * 1024 * 1024))
         
         self.trade_processor = TradeProcessor(self.config)
         
         self.theme = self.config['theme']
         
-        self.trades = []
+        self.trades = TradeTable()
         self.daily_pnl = defaultdict(float)
         self.stats = {}
         self.current_month = datetime.now().month
         self.current_year = datetime.now().year
         self.current_file = None
+        self.loaded_from_cache = False
+        self.appended_trades = None
+        self.dedupe_index = None
+        self.strategies = {}
         self.trades_by_date = {}
         self.performance_metrics = {}
         self.show_performance_logs = False
         self.excluded_dates = set()
         self.exclusion_reason = {}
         self.stats_window = None
+        self.loading_queue = queue.Queue()
+        self.progress_lines = {}
+        self.cancel_event = threading.Event()
+        self.live_import = None
+        self.session_snapshot = None
+        self.session_dataset = None
+        self.store_view = None
+        self.restore_queue = queue.Queue()
         
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.restore_last_session()
+        self.compact_storage()
     
     def check_launcher_updates(self):
         if os.environ.get('STRATEGY_ANALYZER_VERSION') == 'DEV':
@@ -655,6 +3865,16 @@ class StrategyAnalyzer:
                                    bg=self.theme['bg_card'])
         self.file_status.pack(side='left', padx=(20, 0), pady=20)
         
+        self.strategy_var = tk.StringVar(value="")
+        self.strategy_menu = tk.OptionMenu(left_frame, self.strategy_var, "")
+        self.strategy_menu.config(font=('Inter', 9),
+                                  bg=self.theme['bg_accent'],
+                                  fg=self.theme['text_primary'],
+                                  border=0,
+                                  highlightthickness=0,
+                                  activebackground=self.theme['hover'],
+                                  activeforeground=self.theme['text_primary'])
+        
     def create_stats_section(self, parent):
         stats_container = tk.Frame(parent, bg=self.theme['bg_dark'])
         stats_container.pack(fill='x', pady=20)
@@ -879,9 +4099,10 @@ class StrategyAnalyzer:
                 widget.bind('<Enter>', on_enter)
                 widget.bind('<Leave>', on_leave)
     
-    def create_optimized_day_cell(self, day, pnl, day_trades, row, col):
+    def create_optimized_day_cell(self, day, pnl, day_trades, row, col, trade_count=None):
         """Optimized version that accepts pre-calculated data to avoid lookups"""
-        trade_count = len(day_trades)
+        if trade_count is None:
+            trade_count = len(day_trades)
         date_key = f"{self.current_year}-{self.current_month:02d}-{day:02d}"
         is_excluded = date_key in self.excluded_dates
         
@@ -973,14 +4194,14 @@ class StrategyAnalyzer:
     def show_settings(self):
         settings_window = tk.Toplevel(self.root)
         settings_window.title("Settings")
-        settings_window.geometry("500x450")
+        settings_window.geometry("500x520")
         settings_window.configure(bg=self.theme['bg_dark'])
         settings_window.transient(self.root)
         settings_window.grab_set()
         
         settings_window.geometry("+{}+{}".format(
             int(self.root.winfo_screenwidth()/2 - 250),
-            int(self.root.winfo_screenheight()/2 - 225)
+            int(self.root.winfo_screenheight()/2 - 260)
         ))
         
         main_frame = tk.Frame(settings_window, bg=self.theme['bg_dark'])
@@ -1106,6 +4327,42 @@ class StrategyAnalyzer:
                 fg=self.theme['text_muted'],
                 bg=self.theme['bg_card']).pack(anchor='w', padx=(0, 0), pady=(5, 0))
         
+        export_frame = tk.Frame(data_content, bg=self.theme['bg_card'])
+        export_frame.pack(fill='x', pady=(15, 0))
+        
+        history_btn = tk.Button(export_frame,
+                               text="Session History...",
+                               font=('Inter', 10, 'bold'),
+                               bg=self.theme['bg_accent'],
+                               fg=self.theme['text_primary'],
+                               border=0,
+                               padx=20,
+                               pady=8,
+                               cursor='hand2',
+                               activebackground=self.theme['hover'],
+                               command=lambda: (settings_window.destroy(), self.show_session_history()))
+        history_btn.pack(side='left', anchor='n', padx=(0, 10))
+        
+        export_btn = tk.Button(export_frame,
+                              text="Export as JSON...",
+                              font=('Inter', 10, 'bold'),
+                              bg=self.theme['bg_accent'],
+                              fg=self.theme['text_primary'],
+                              border=0,
+                              padx=20,
+                              pady=8,
+                              cursor='hand2',
+                              activebackground=self.theme['hover'],
+                              command=self.export_json,
+                              state='normal' if self.trades else 'disabled')
+        export_btn.pack(side='left', anchor='n')
+        
+        tk.Label(data_content,
+                text="Write the loaded trades, daily P&L and stats to a readable JSON file",
+                font=('Inter', 9),
+                fg=self.theme['text_muted'],
+                bg=self.theme['bg_card']).pack(anchor='w', pady=(5, 0))
+        
         button_frame = tk.Frame(main_frame, bg=self.theme['bg_dark'])
         button_frame.pack(fill='x', pady=(20, 0))
         
@@ -1173,12 +4430,137 @@ class StrategyAnalyzer:
             
             count = 0
             for filename in os.listdir(data_dir):
-                if filename.endswith('.json'):
+                if filename.endswith(self.data_manager.SAVED_DATA_EXTENSIONS) and filename not in self.data_manager.INDEX_FILES:
                     count += 1
             return count
         except Exception:
             return 0
     
+    def show_session_history(self):
+        """Sortable list of saved sessions, read from the session index"""
+        history_window = tk.Toplevel(self.root)
+        history_window.title("Session History")
+        history_window.geometry("900x500")
+        history_window.configure(bg=self.theme['bg_dark'])
+        history_window.transient(self.root)
+        
+        main_frame = tk.Frame(history_window, bg=self.theme['bg_dark'])
+        main_frame.pack(fill='both', expand=True, padx=20, pady=20)
+        
+        tk.Label(main_frame,
+                text="Session History",
+                font=('Inter', 16, 'bold'),
+                fg=self.theme['text_primary'],
+                bg=self.theme['bg_dark']).pack(anchor='w', pady=(0, 10))
+        
+        columns = [
+            ('saved', "Saved", 140, lambda e: e['modified']),
+            ('source', "Source", 220, lambda e: (e.get('original_filename') or e['filename']).lower()),
+            ('trades', "Trades", 80, lambda e: e['total_trades']),
+            ('first', "From", 90, lambda e: e['first_date'] or ''),
+            ('last', "To", 90, lambda e: e['last_date'] or ''),
+            ('net', "Net P&L", 110, lambda e: e['net_pnl']),
+            ('size', "Size", 80, lambda e: e['size'])
+        ]
+        sort_keys = {column: key for column, _, _, key in columns}
+        
+        table_frame = tk.Frame(main_frame, bg=self.theme['bg_dark'])
+        table_frame.pack(fill='both', expand=True)
+        tree = ttk.Treeview(table_frame, columns=[c[0] for c in columns], show='headings', selectmode='browse')
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+        
+        entries = {}
+        sort_state = {'column': 'saved', 'reverse': True}
+        
+        def populate():
+            tree.delete(*tree.get_children())
+            entries.clear()
+            ordered = sorted(self.data_manager.get_data_history(),
+                             key=sort_keys[sort_state['column']], reverse=sort_state['reverse'])
+            for entry in ordered:
+                entries[entry['filename']] = entry
+                tree.insert('', 'end', iid=entry['filename'], values=(
+                    datetime.fromtimestamp(entry['modified']).strftime('%Y-%m-%d %H:%M'),
+                    entry.get('original_filename') or entry['filename'],
+                    f"{entry['total_trades']:,}",
+                    entry['first_date'] or '',
+                    entry['last_date'] or '',
+                    f"${entry['net_pnl']:,.2f}",
+                    self.format_file_size(entry['size'])
+                ))
+        
+        def sort_by(column):
+            sort_state['reverse'] = not sort_state['reverse'] if sort_state['column'] == column else column != 'source'
+            sort_state['column'] = column
+            populate()
+        
+        for column, heading, width, _ in columns:
+            tree.heading(column, text=heading, command=lambda c=column: sort_by(c))
+            tree.column(column, width=width, anchor='w' if column == 'source' else 'e')
+        
+        def open_selected(event=None):
+            selection = tree.selection()
+            if not selection:
+                return
+            entry = entries[selection[0]]
+            self.restore_session(entry['path'], {}, replace=True)
+            history_window.destroy()
+        
+        def delete_selected():
+            selection = tree.selection()
+            if not selection:
+                return
+            if not messagebox.askyesno("Delete Session", f"Delete the saved session {selection[0]}?",
+                                       icon='warning', parent=history_window):
+                return
+            if self.session_snapshot and os.path.basename(self.session_snapshot) == selection[0]:
+                self.save_session(None)
+            self.data_manager.delete_session(selection[0])
+            populate()
+        
+        tree.bind('<Double-1>', open_selected)
+        
+        button_frame = tk.Frame(main_frame, bg=self.theme['bg_dark'])
+        button_frame.pack(fill='x', pady=(15, 0))
+        
+        for text, command, color, active in (("Close", history_window.destroy, self.theme['bg_accent'], self.theme['hover']),
+                                             ("Open", open_selected, self.theme['accent_blue'], '#2563eb'),
+                                             ("Delete", delete_selected, self.theme['accent_red'], '#dc2626')):
+            tk.Button(button_frame,
+                     text=text,
+                     font=('Inter', 10, 'bold'),
+                     bg=color,
+                     fg='white',
+                     border=0,
+                     padx=20,
+                     pady=8,
+                     cursor='hand2',
+                     activebackground=active,
+                     command=command).pack(side='right', padx=(10, 0))
+        
+        populate()
+        history_window.bind('<Escape>', lambda e: history_window.destroy())
+    
+    def export_json(self):
+        base_name = os.path.splitext(os.path.basename(self.current_file))[0] if self.current_file else "trades"
+        export_file = filedialog.asksaveasfilename(
+            title="Export Trading Data",
+            defaultextension=".json",
+            initialfile=f"{base_name}.json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        )
+        if not export_file:
+            return
+        
+        if self.data_manager.export_trading_data_json(export_file, self.current_file,
+                                                      self.trades, self.daily_pnl, self.stats):
+            messagebox.showinfo("Export Complete", f"Trading data exported to {os.path.basename(export_file)}")
+        else:
+            messagebox.showerror("Export Failed", "Could not write the JSON export.")
+    
     def clear_data_folder(self):
         """Clear all saved data files from the data folder"""
         try:
@@ -1188,7 +4570,7 @@ class StrategyAnalyzer:
             
             files_deleted = 0
             for filename in os.listdir(data_dir):
-                if filename.endswith('.json'):
+                if filename.endswith(self.data_manager.SAVED_DATA_EXTENSIONS) and filename not in self.data_manager.INDEX_FILES:
                     filepath = os.path.join(data_dir, filename)
                     try:
                         os.remove(filepath)
@@ -1196,6 +4578,18 @@ class StrategyAnalyzer:
                     except (OSError, IOError):
                         continue
             
+            self.data_manager.clear_import_cache()
+            self.data_manager.clear_datasets()
+            self.data_manager.clear_profiles()
+            self.data_manager.clear_checkpoints()
+            self.data_manager.clear_trade_store()
+            self.data_manager.clear_session_state()
+            self.data_manager.clear_session_index()
+            self.data_manager.clear_blobs()
+            self.session_snapshot = None
+            self.session_dataset = None
+            self.store_view = None
+            
             print(f"Cleared {files_deleted} data files from storage")
             return True
         except Exception as e:
@@ -1361,21 +4755,69 @@ class StrategyAnalyzer:
                     bg=self.theme['bg_dark']).pack(side='left', padx=(15, 0))
     
     def load_file(self):
-        file_path = filedialog.askopenfilename(
+        file_paths = filedialog.askopenfilenames(
             title="Select TradingView Export",
-            filetypes=[("Excel files", "*.xlsx *.xls")]
+            filetypes=[("Trade exports", "*.xlsx *.xls *.csv *.htm *.html *.zip *.gz"),
+                       ("Excel files", "*.xlsx *.xls"),
+                       ("CSV files", "*.csv"),
+                       ("MetaTrader reports", "*.htm *.html"),
+                       ("Compressed exports", "*.zip *.gz")]
         )
         
-        if not file_path:
+        if not file_paths:
             return
         
-        self.current_file = file_path
+        file_paths = list(file_paths)
+        
+        if len(file_paths) == 1:
+            self.current_file = file_paths[0]
             
-        self.show_loading_dialog(file_path)
+            append = False
+            dataset = self.data_manager.find_dataset(file_paths[0])
+            if dataset:
+                append = messagebox.askyesnocancel(
+                    "Existing Dataset",
+                    f"A stored dataset for '{dataset['source_filename']}' already holds "
+                    f"{dataset['total_trades']} trades.\n\n"
+                    "Yes: import only trades with new Trade #s\n"
+                    "No: re-import the whole file"
+                )
+                if append is None:
+                    return
+            
+            preview_min_bytes = self.config.get("import", {}).get("preview_min_bytes", 20 * 1024 * 1024)
+            if not append and os.path.getsize(file_paths[0]) >= preview_min_bytes:
+                if not self.confirm_import_preview(file_paths[0]):
+                    return
+            
+            self.show_loading_dialog(file_paths[0], append=append)
+            return
+        
+        merge = messagebox.askyesnocancel(
+            "Multiple Files",
+            f"{len(file_paths)} files selected.\n\n"
+            "Yes: merge them into one dataset\n"
+            "No: keep each file as a separate strategy"
+        )
+        if merge is None:
+            return
+        
+        self.show_loading_dialog(file_paths[0], file_paths, merge)
+    
+    def confirm_import_preview(self, file_path):
+        """Peek at a large export so the user can back out before paying for the full import"""
+        try:
+            preview = TradeProcessor(self.config).peek(file_path)
+        except Exception as e:
+            return messagebox.askyesno("Preview Failed",
+                                       f"Could not preview {os.path.basename(file_path)}: {e}\n\nImport anyway?")
+        
+        lines = TradeProcessor.format_preview(preview)
+        return messagebox.askokcancel("Import Preview", "\n".join(lines) + "\n\nImport this file?")
     
-    def show_loading_dialog(self, file_path):
+    def show_loading_dialog(self, file_path, file_paths=None, merge=False, append=False):
         self.loading_dialog = tk.Toplevel(self.root)
-        self.loading_dialog.title("Processing Excel File")
+        self.loading_dialog.title("Importing Trades")
         self.loading_dialog.geometry("500x350")
         self.loading_dialog.configure(bg=self.theme['bg_dark'])
         self.loading_dialog.transient(self.root)
@@ -1388,22 +4830,24 @@ class StrategyAnalyzer:
         
         self.loading_dialog.protocol("WM_DELETE_WINDOW", self.close_loading_dialog)
         self.loading_dialog.bind('<Escape>', lambda e: self.close_loading_dialog())
-        self.loading_dialog.bind('<Return>', lambda e: self.close_loading_dialog())
         self.loading_dialog.attributes('-topmost', True)
         
         main_frame = tk.Frame(self.loading_dialog, bg=self.theme['bg_dark'])
         main_frame.pack(fill='both', expand=True, padx=20, pady=20)
         
         title_label = tk.Label(main_frame,
-                              text="Processing Excel File",
+                              text="Importing Trades",
                               font=('Inter', 18, 'bold'),
                               fg=self.theme['accent_blue'],
                               bg=self.theme['bg_dark'])
         title_label.pack(pady=(0, 20))
         
-        filename = os.path.basename(file_path)
+        if file_paths:
+            file_text = f"Files: {len(file_paths)} selected"
+        else:
+            file_text = f"File: {os.path.basename(file_path)}"
         file_label = tk.Label(main_frame,
-                             text=f"File: {filename}",
+                             text=file_text,
                              font=('Inter', 12),
                              fg=self.theme['text_secondary'],
                              bg=self.theme['bg_dark'])
@@ -1428,33 +4872,72 @@ class StrategyAnalyzer:
                                   wrap='word')
         self.loading_log.pack(fill='both', expand=True, padx=15, pady=(0, 15))
         
-        self.process_file_background(file_path)
+        self.loading_queue = queue.Queue()
+        self.progress_lines = {}
+        self.cancel_event = threading.Event()
+        self.poll_loading_queue(self.loading_dialog)
         
-    def process_file_background(self, file_path):
+        if file_paths:
+            self.process_files_background(file_paths, merge)
+        else:
+            self.process_file_background(file_path, append)
+        
+    def process_file_background(self, file_path, append=False):
         processing_thread = threading.Thread(
             target=self.process_file_with_logging,
-            args=(file_path,),
+            args=(file_path, append),
             daemon=True
         )
         processing_thread.start()
         
-    def process_file_with_logging(self, file_path):
+    def process_file_with_logging(self, file_path, append=False):
         import time
         start_time = time.time()
         
         try:
-            result = self.trade_processor.process_file(file_path, self.log_loading)
+            self.appended_trades = None
+            self.dedupe_index = None
+            self.loaded_from_cache = False
+            self.trade_processor.cancel_event = self.cancel_event
+            self.trade_processor.partial_callback = self.publish_partial_import
+            base = self.data_manager.load_dataset(file_path) if append else None
+            self.post_loading_event(lambda: self.start_live_import(base))
+            
+            if base is not None:
+                self.log_loading(f"Stored dataset: {len(base['trades'])} trades")
+                self.dedupe_index = self.data_manager.load_dedupe_index(file_path)
+                new_result = self.trade_processor.process_new_trades(file_path, self.dedupe_index, self.log_loading)
+                self.appended_trades = new_result['trades']
+                self.log_loading(f"New trades: {len(self.appended_trades)}")
+                result = self.trade_processor.fold_new_trades(base, new_result)
+            else:
+                fingerprint = self.data_manager.fingerprint_file(file_path)
+                result = self.data_manager.load_cached_result(fingerprint)
+                self.loaded_from_cache = result is not None
+                
+                sheets = [] if self.loaded_from_cache else self.trade_processor.find_trades_sheets(file_path)
+                
+                if self.loaded_from_cache:
+                    self.log_loading("Unchanged file - loaded from import cache")
+                elif len(sheets) > 1:
+                    result = self.process_sheets_concurrently(file_path, sheets)
+                    self.data_manager.store_cached_result(fingerprint, result)
+                else:
+                    self.trade_processor.checkpoint = self.import_checkpoint(file_path, fingerprint)
+                    try:
+                        result = self.trade_processor.import_file(file_path, self.log_loading)
+                    finally:
+                        self.trade_processor.checkpoint = None
+                    self.data_manager.store_cached_result(fingerprint, result)
+                    self.report_import_profile(file_path)
             
             end_time = time.time()
             processing_time = end_time - start_time
             
-            self.trades = result['trades']
-            self.daily_pnl = defaultdict(float, result['daily_pnl'])
-            self.stats = result['stats']
-            
-            total_pnl = self.stats.get('total_pnl', 0)
-            total_trades = self.stats.get('total_trades', 0)
-            win_rate = self.stats.get('win_rate', 0)
+            stats = result['stats']
+            total_pnl = stats.get('total_pnl', 0)
+            total_trades = stats.get('total_trades', 0)
+            win_rate = stats.get('win_rate', 0)
             
             self.log_loading(f"Total P&L: ${total_pnl:,.2f}")
             self.log_loading(f"Total Trades: {total_trades}")
@@ -1463,33 +4946,557 @@ class StrategyAnalyzer:
             
             self.log_loading("Preparing calendar display...")
             
-            self.loading_dialog.after(0, self.finish_processing)
+            self.post_loading_event(lambda: self.finish_processing(result))
             
+        except ImportCancelled:
+            print("Import cancelled")
         except Exception as e:
             error_msg = str(e)
             self.log_loading(f"ERROR: {error_msg}")
-            self.loading_dialog.after(0, lambda: self.show_processing_error(error_msg))
+            self.post_loading_event(lambda: self.show_processing_error(error_msg))
+    
+    def import_checkpoint(self, file_path, fingerprint):
+        """Checkpoint for a file big enough that losing a half-finished import would hurt"""
+        import_config = self.config.get("import", {})
+        if os.path.getsize(file_path) < import_config.get("checkpoint_min_bytes", 50 * 1024 * 1024):
+            return None
+        
+        checkpoint = ImportCheckpoint(self.data_manager.checkpoint_path(fingerprint),
+                                      import_config.get("checkpoint_interval_s", 15))
+        state = checkpoint.load()
+        if state is not None:
+            self.log_loading(f"Found checkpoint from {state['saved_at'][:19]}: "
+                             f"{len(state['trades'])} trades after {state['rows_parsed']:,} rows")
+        return checkpoint
+    
+    def process_sheets_concurrently(self, file_path, sheets):
+        self.log_loading(f"Found {len(sheets)} trades sheets, processing on {self.pool_size(len(sheets))} workers...")
+        
+        jobs = [(sheet, process_sheet_worker, (file_path, sheet, self.config)) for sheet in sheets]
+        sheet_results = self.run_worker_pool(jobs)
+        if self.cancel_event.is_set():
+            raise ImportCancelled("Import cancelled")
+        if not sheet_results:
+            raise ValueError("None of the trades sheets could be processed")
+        
+        return TradeProcessor(self.config).merge_sheet_results({sheet: sheet_results[sheet] for sheet in sheets
+                                                                if sheet in sheet_results})
+    
+    def report_import_profile(self, file_path):
+        """Show the per-stage timings of the last import and keep them as a JSON report"""
+        profile = self.trade_processor.profiler.report(file_path)
+        for line in ImportProfiler.format_report(profile):
+            self.log_loading(line)
+        
+        profile_file = self.data_manager.save_import_profile(profile)
+        if profile_file:
+            self.log_loading(f"Profile saved: {os.path.basename(profile_file)}")
+    
+    def process_files_background(self, file_paths, merge):
+        processing_thread = threading.Thread(
+            target=self.process_files_with_logging,
+            args=(file_paths, merge),
+            daemon=True
+        )
+        processing_thread.start()
+    
+    def process_files_with_logging(self, file_paths, merge):
+        start_time = time.time()
+        results = {}
+        pending = []
+        
+        for file_path in file_paths:
+            name = os.path.basename(file_path)
+            try:
+                fingerprint = self.data_manager.fingerprint_file(file_path)
+            except (IOError, OSError) as e:
+                self.log_loading(f"[{name}] ERROR: {e}")
+                continue
+            
+            cached = self.data_manager.load_cached_result(fingerprint)
+            if cached is not None:
+                results[file_path] = (cached, True)
+                self.log_loading(f"[{name}] Unchanged file - loaded from import cache")
+            else:
+                pending.append((file_path, fingerprint))
+        
+        if pending:
+            fingerprints = dict(pending)
+            jobs = [(file_path, process_file_worker, (file_path, self.config)) for file_path, _ in pending]
+            self.log_loading(f"Processing {len(pending)} files on {self.pool_size(len(pending))} workers...")
+            
+            for file_path, result in self.run_worker_pool(jobs).items():
+                self.data_manager.store_cached_result(fingerprints[file_path], result)
+                results[file_path] = (result, False)
+        
+        if self.cancel_event.is_set():
+            print("Import cancelled")
+            return
+        
+        if not results:
+            self.post_loading_event(lambda: self.show_processing_error("None of the selected files could be processed"))
+            return
+        
+        self.log_loading(f"Processed {len(results)}/{len(file_paths)} files in {time.time() - start_time:.2f} seconds")
+        self.log_loading("Preparing calendar display...")
+        
+        self.post_loading_event(lambda: self.finish_multi_processing(file_paths, results, merge))
+    
+    def pool_size(self, job_count):
+        max_workers = self.config.get("import", {}).get("max_workers") or os.cpu_count() or 1
+        return min(job_count, max_workers)
+    
+    def run_worker_pool(self, jobs):
+        """Run (key, worker, args) jobs in a process pool, forwarding progress and cancellation; results by key"""
+        results = {}
+        
+        with multiprocessing.Manager() as manager:
+            progress_queue = manager.Queue()
+            worker_cancel = manager.Event()
+            
+            with ProcessPoolExecutor(max_workers=self.pool_size(len(jobs))) as executor:
+                futures = {
+                    executor.submit(worker, *args, progress_queue, worker_cancel): key
+                    for key, worker, args in jobs
+                }
+                not_done = set(futures)
+                
+                while not_done:
+                    if self.cancel_event.is_set() and not worker_cancel.is_set():
+                        worker_cancel.set()
+                        for future in not_done:
+                            future.cancel()
+                    
+                    done, not_done = wait(not_done, timeout=0.1, return_when=FIRST_COMPLETED)
+                    self._drain_worker_progress(progress_queue)
+                    
+                    for future in done:
+                        key = futures[future]
+                        name = os.path.basename(key)
+                        try:
+                            result = future.result()
+                        except (ImportCancelled, CancelledError):
+                            continue
+                        except Exception as e:
+                            self.log_loading(f"[{name}] ERROR: {e}")
+                            continue
+                        
+                        results[key] = result
+                        self.log_loading(f"[{name}] Done: {len(result['trades'])} trades "
+                                         f"({len(results)}/{len(jobs)})")
+            
+            self._drain_worker_progress(progress_queue)
+        
+        return results
+    
+    def _drain_worker_progress(self, progress_queue):
+        while True:
+            try:
+                file_path, message = progress_queue.get_nowait()
+            except queue.Empty:
+                return
+            self.log_loading(f"[{os.path.basename(file_path)}] {message}")
     
     def log_loading(self, message):
-        def update_log():
-            self.loading_log.insert('end', f"{message}\n")
-            self.loading_log.see('end')
-            self.loading_dialog.update()
+        """Queue a log line for the loading dialog; safe to call from any thread"""
+        self.loading_queue.put(message)
+    
+    def post_loading_event(self, callback):
+        """Run callback on the Tk thread once the log lines queued before it are shown"""
+        self.loading_queue.put(callback)
+    
+    def poll_loading_queue(self, dialog):
+        """Drain the loading queue on a fixed interval, collapsing progress updates into one line each"""
+        if dialog is not self.loading_dialog or not dialog.winfo_exists():
+            return
+        
+        shown = False
+        while True:
+            try:
+                item = self.loading_queue.get_nowait()
+            except queue.Empty:
+                break
+            if callable(item):
+                item()
+            else:
+                self._show_loading_message(item)
+                shown = True
+        
+        try:
+            if shown:
+                self.loading_log.see('end')
+            dialog.after(self.LOADING_POLL_MS, lambda: self.poll_loading_queue(dialog))
+        except tk.TclError:
+            pass
+    
+    def _show_loading_message(self, message):
+        match = self.PROGRESS_LINE_PATTERN.match(message)
+        key = match.group(0) if match else None
+        
+        if key in self.progress_lines:
+            line = self.progress_lines[key]
+            self.loading_log.delete(f"{line}.0", f"{line}.end")
+            self.loading_log.insert(f"{line}.0", message)
+            return
+        
+        self.loading_log.insert('end', f"{message}\n")
+        if key:
+            self.progress_lines[key] = int(self.loading_log.index('end-1c').split('.')[0]) - 1
+    
+    def start_live_import(self, base=None):
+        """Begin previewing an import on the calendar, on top of the stored dataset when appending"""
+        self.live_import = {
+            'previous': (self.daily_pnl, self.stats),
+            'base': base,
+            'refresh_pending': False
+        }
+        self.reset_live_import(self.live_import)
+    
+    def reset_live_import(self, live):
+        """Drop every partial applied so far, back to the stored dataset or to nothing"""
+        base = live['base']
+        live.update({
+            'daily_pnl': defaultdict(float, base['daily_pnl'] if base else {}),
+            'trade_counts': defaultdict(int, base['trades'].daily_counts() if base else {}),
+            'total_pnl': base['stats']['total_pnl'] if base else 0.0,
+            'winning_trades': round(base['stats']['win_rate'] * base['stats']['total_trades'] / 100) if base else 0,
+            'total_trades': base['stats']['total_trades'] if base else 0
+        })
+    
+    def publish_partial_import(self, partial):
+        """Partial aggregates from the parser thread, applied on the Tk thread in queue order"""
+        self.post_loading_event(lambda: self.apply_partial_import(partial))
+    
+    def apply_partial_import(self, partial):
+        live = self.live_import
+        if live is None:
+            return
+        
+        if partial.get('reset'):
+            # A fallback importer is starting over, and will send its own partials from the first row
+            self.reset_live_import(live)
+        else:
+            for date_key, pnl in partial['daily_pnl'].items():
+                live['daily_pnl'][date_key] += pnl
+            for date_key, count in partial['trade_counts'].items():
+                live['trade_counts'][date_key] += count
+            for key in ('total_pnl', 'winning_trades', 'total_trades'):
+                live[key] += partial[key]
+        
+        if not live['refresh_pending']:
+            live['refresh_pending'] = True
+            self.root.after(self.LIVE_REFRESH_MS, self.refresh_live_import)
+    
+    def refresh_live_import(self):
+        live = self.live_import
+        if live is None:
+            return
+        live['refresh_pending'] = False
+        
+        total_trades = live['total_trades']
+        trading_days = sum(1 for pnl in live['daily_pnl'].values() if pnl != 0)
+        self.daily_pnl = live['daily_pnl']
+        self.trades_by_date = {}
+        self.stats = {
+            'total_pnl': live['total_pnl'],
+            'win_rate': live['winning_trades'] / total_trades * 100 if total_trades else 0,
+            'avg_daily': live['total_pnl'] / trading_days if trading_days else 0,
+            'total_trades': total_trades
+        }
         
-        self.loading_dialog.after(0, update_log)
+        self.update_stats_display()
+        self.update_calendar()
     
-    def finish_processing(self):
+    def stop_live_import(self, restore=False):
+        """End the preview; restore puts back what was displayed before the import started"""
+        live = self.live_import
+        self.live_import = None
+        if live is not None and restore:
+            self.daily_pnl, self.stats = live['previous']
+            self.update_displays()
+    
+    def finish_processing(self, result):
         self.log_loading("Processing complete!")
+        self.loading_dialog.bind('<Return>', lambda e: self.continue_to_calendar())
         
-        self.update_displays()
+        self.stop_live_import()
+        self.trades = result['trades']
+        self.daily_pnl = defaultdict(float, result['daily_pnl'])
+        self.stats = result['stats']
+        sheets = result.get('sheets', {})
         
-        if self.current_file and self.trades and self.stats:
-            self.data_manager.save_trading_data(self.current_file, self.trades, self.daily_pnl, self.stats)
+        self.update_displays()
+        self.data_manager.release_snapshot_maps()
+        
+        result = {'trades': self.trades, 'daily_pnl': self.daily_pnl, 'stats': self.stats}
+        if self.appended_trades is not None:
+            # The dataset already holds every segment, so the session points at it rather than at a full snapshot
+            if len(self.appended_trades):
+                self.data_manager.append_dataset_segment(self.current_file, self.appended_trades, result,
+                                                         self.dedupe_index)
+            self.save_session(dataset=self.current_file)
+            self.store_view = self.store_trades(self.current_file, self.trades, len(self.appended_trades))
+        elif self.current_file and self.trades and self.stats:
+            self.save_session(self.session_snapshot_for(self.current_file, result, self.loaded_from_cache))
+            if not self.loaded_from_cache:
+                self.data_manager.store_dataset(self.current_file, result)
+            self.store_view = self.store_trades(self.current_file, self.trades)
+        else:
+            self.save_session(None)
+            self.store_view = None
+        
+        self.strategies = {}
+        if len(sheets) > 1:
+            all_sheets = f"All sheets ({len(sheets)})"
+            self.strategies[all_sheets] = dict(result, file=self.current_file, snapshot=self.session_snapshot,
+                                               dataset=self.session_dataset, store_view=self.store_view)
+            for sheet, sheet_result in sheets.items():
+                self.strategies[sheet] = dict(sheet_result, file=self.current_file)
+            self.strategy_var.set(all_sheets)
+        self.update_strategy_selector()
         
         filename = os.path.basename(self.current_file) if self.current_file else "Unknown"
         self.file_status.config(text=f"Loaded: {filename}")
     
+    def store_trades(self, file_path, trades, new_trades=0):
+        """Queue trades for the trade store; returns the store view month lookups use once the write has landed"""
+        return {self.data_manager.dataset_key(file_path): self.data_manager.store_trades(file_path, trades, new_trades)}
+    
+    def stored_strategies(self):
+        """Store keys holding exactly the trades on screen, None while a write is pending or the view is not stored"""
+        if not self.store_view or self.live_import is not None:
+            return None
+        try:
+            for strategy, write in self.store_view.items():
+                if not write.done() or write.exception() is not None or write.result() is None:
+                    return None
+                if self.data_manager.trade_store.digest(strategy) != write.result():
+                    return None
+        except sqlite3.Error:
+            return None
+        return list(self.store_view)
+    
+    def displayed_month_range(self):
+        last_day = calendar.monthrange(self.current_year, self.current_month)[1]
+        return date(self.current_year, self.current_month, 1), date(self.current_year, self.current_month, last_day)
+    
+    def month_view(self):
+        """Daily P&L and trades by day for the displayed month, looked up in the trade store once it holds them"""
+        strategies = self.stored_strategies()
+        if strategies is not None:
+            start, end = self.displayed_month_range()
+            store = self.data_manager.trade_store
+            try:
+                return store.daily_pnl(strategies, start, end), store.trades(strategies, start, end).group_by_date()
+            except sqlite3.Error as e:
+                print(f"Error querying trade store: {e}")
+        return self.daily_pnl, self.trades_by_date
+    
+    def range_stats(self, start=None, end=None):
+        """TradeTable.range_stats of the trades on screen, from the trade store's index once it holds them"""
+        strategies = self.stored_strategies()
+        if strategies is not None:
+            try:
+                return self.data_manager.trade_store.range_stats(strategies, start, end)
+            except sqlite3.Error as e:
+                print(f"Error querying trade store: {e}")
+        return self.trades.range_stats(start, end)
+    
+    def session_snapshot_for(self, file_path, result, from_cache=False):
+        """Saved session holding this import's trades; an unchanged file reuses the one saved when it was imported"""
+        snapshot = self.data_manager.find_session(file_path, result['trades']) if from_cache else None
+        return snapshot or self.data_manager.save_trading_data(file_path, result['trades'], result['stats'])
+    
+    def save_session(self, snapshot=None, dataset=None):
+        """Make what is on screen the session restored at next launch; with neither a snapshot nor a dataset
+        behind it, nothing is restored rather than a session that no longer matches the screen"""
+        self.session_snapshot, self.session_dataset = snapshot, dataset
+        if snapshot or dataset:
+            self.save_session_state()
+            self.compact_storage()
+        else:
+            self.data_manager.clear_session_state()
+    
+    def compact_storage(self):
+        self.data_manager.compact_storage_in_background(self.config.get("retention", {}), [self.session_snapshot])
+    
+    def save_session_state(self):
+        if self.session_snapshot:
+            session = {'snapshot': os.path.basename(self.session_snapshot)}
+        elif self.session_dataset:
+            session = {'dataset': self.session_dataset}
+        else:
+            return
+        self.data_manager.save_session_state(dict(
+            session,
+            source_file=self.current_file,
+            year=self.current_year,
+            month=self.current_month,
+            excluded_dates=sorted(self.excluded_dates),
+            exclusion_reason=self.exclusion_reason
+        ))
+    
+    def on_close(self):
+        self.save_session_state()
+        self.root.destroy()
+    
+    def restore_last_session(self):
+        """Find and load the last saved session on a background thread; the window renders empty until it arrives"""
+        self.restore_session(None, None)
+    
+    def restore_session(self, snapshot, state, replace=False):
+        """Load a saved session in the background; replace swaps out whatever is on screen, and no state means
+        whichever session was open last"""
+        self.file_status.config(text="Restoring session..." if replace else "Restoring last session...")
+        thread = threading.Thread(target=self._load_session, args=(snapshot, state, replace), daemon=True)
+        thread.start()
+        self.root.after(self.LOADING_POLL_MS, lambda: self.poll_restore_queue(thread))
+    
+    def _load_session(self, snapshot, state, replace=False):
+        try:
+            if state is None:
+                # Finding it may mean rebuilding the session index from every older save, so not on the Tk thread
+                snapshot, state = self.data_manager.latest_session() or (None, {})
+            if snapshot is not None:
+                session = self.data_manager.load_trading_data(snapshot, mapped=True)
+            elif state.get('dataset'):
+                session = self.data_manager.load_dataset(state['dataset'])
+            else:
+                session = None
+        except Exception as e:
+            print(f"Error restoring session: {e}")
+            session = None
+        self.restore_queue.put(lambda: self.apply_restored_session(snapshot, session, state, replace))
+        
+        # Grouping every trade by day is the slow part of a restore, so large sessions do it here
+        if session and len(session['trades']) > self.RESTORE_DETAIL_TRADES:
+            trades = session['trades']
+            trades_by_date = trades.group_by_date()
+            self.restore_queue.put(lambda: self.apply_restored_detail(trades, trades_by_date))
+    
+    def poll_restore_queue(self, thread):
+        while True:
+            try:
+                self.restore_queue.get_nowait()()
+            except queue.Empty:
+                break
+        
+        if thread.is_alive() or not self.restore_queue.empty():
+            self.root.after(self.LOADING_POLL_MS, lambda: self.poll_restore_queue(thread))
+    
+    def apply_restored_session(self, snapshot, session, state, replace=False):
+        if not replace and (self.current_file is not None or len(self.trades)):
+            return
+        if session is None:
+            self.file_status.config(text="Could not restore the session" if replace else "No file loaded")
+            return
+        
+        if replace:
+            self.strategies = {}
+            self.update_strategy_selector()
+            self.trades_by_date = {}
+        self.trades = session['trades']
+        self.daily_pnl = defaultdict(float, session['daily_pnl'])
+        self.stats = session['stats']
+        self.current_file = state.get('source_file', session.get('source_file'))
+        self.session_snapshot = snapshot
+        self.session_dataset = None if snapshot else state.get('dataset')
+        self.store_view = self.store_trades(self.current_file, self.trades) if self.current_file else None
+        self.excluded_dates = set(state.get('excluded_dates', []))
+        self.exclusion_reason = dict(state.get('exclusion_reason', {}))
+        if 'year' in state and 'month' in state:
+            self.current_year, self.current_month = state['year'], state['month']
+        elif len(self.trades):
+            last_date = date.fromordinal(int(self.trades.dates.max()))
+            self.current_year, self.current_month = last_date.year, last_date.month
+        
+        self.update_stats_display()
+        if len(self.trades) <= self.RESTORE_DETAIL_TRADES:
+            self.cache_trades_by_date()
+        self.update_calendar()
+        self.data_manager.release_snapshot_maps()
+        
+        name = os.path.basename(self.current_file) if self.current_file else session.get('original_filename')
+        self.file_status.config(text=f"Restored: {name or 'last session'}")
+    
+    def apply_restored_detail(self, trades, trades_by_date):
+        if self.trades is trades:
+            self.trades_by_date = trades_by_date
+            self.update_calendar()
+    
+    def finish_multi_processing(self, file_paths, results, merge):
+        self.log_loading("Processing complete!")
+        self.loading_dialog.bind('<Return>', lambda e: self.continue_to_calendar())
+        
+        loaded_paths = [file_path for file_path in file_paths if file_path in results]
+        
+        snapshots = {}
+        store_views = {}
+        for file_path in loaded_paths:
+            result, from_cache = results[file_path]
+            if result['trades']:
+                snapshots[file_path] = self.session_snapshot_for(file_path, result, from_cache)
+                store_views[file_path] = self.store_trades(file_path, result['trades'])
+        
+        self.strategies = {}
+        
+        if merge:
+            merged = TradeProcessor(self.config).merge_results(
+                [results[p][0] for p in loaded_paths],
+                [self.data_manager.dataset_key(p) for p in loaded_paths]
+            )
+            duplicates = sum(len(results[p][0]['trades']) for p in loaded_paths) - len(merged['trades'])
+            if duplicates:
+                self.log_loading(f"Skipped {duplicates} trades repeated across overlapping exports")
+            # Without overlaps the merged view is the stored strategies side by side, so the store answers it
+            # across them; a merged view has no snapshot of its own, so nothing is restored at the next launch
+            store_view = {key: write for view in store_views.values() for key, write in view.items()}
+            if duplicates or len(store_view) != len(store_views):
+                store_view = None
+            self.strategies[f"Merged ({len(loaded_paths)} files)"] = dict(merged, file=None, store_view=store_view)
+        else:
+            for file_path in loaded_paths:
+                name = os.path.basename(file_path)
+                suffix = 2
+                while name in self.strategies:
+                    name = f"{os.path.basename(file_path)} ({suffix})"
+                    suffix += 1
+                self.strategies[name] = dict(results[file_path][0], file=file_path,
+                                             snapshot=snapshots.get(file_path), store_view=store_views.get(file_path))
+        
+        self.update_strategy_selector()
+        self.select_strategy(next(iter(self.strategies)))
+    
+    def select_strategy(self, name):
+        strategy = self.strategies[name]
+        
+        self.strategy_var.set(name)
+        self.current_file = strategy['file']
+        self.trades = strategy['trades']
+        self.daily_pnl = defaultdict(float, strategy['daily_pnl'])
+        self.stats = strategy['stats']
+        self.store_view = strategy.get('store_view')
+        self.save_session(strategy.get('snapshot'), strategy.get('dataset'))
+        
+        self.update_displays()
+        self.data_manager.release_snapshot_maps()
+        
+        self.file_status.config(text=f"Loaded: {name}")
+    
+    def update_strategy_selector(self):
+        menu = self.strategy_menu['menu']
+        menu.delete(0, 'end')
+        for name in self.strategies:
+            menu.add_command(label=name, command=lambda n=name: self.select_strategy(n))
+        
+        if len(self.strategies) > 1:
+            self.strategy_menu.pack(side='left', padx=(10, 0), pady=20)
+        else:
+            self.strategy_menu.pack_forget()
+    
     def show_processing_error(self, error_msg):
+        self.stop_live_import(restore=True)
+        
         error_btn = tk.Button(self.loading_dialog,
                              text="Close",
                              font=('Inter', 12, 'bold'),
@@ -1508,6 +5515,9 @@ class StrategyAnalyzer:
         self.close_loading_dialog()
     
     def close_loading_dialog(self):
+        self.cancel_event.set()
+        if self.live_import is not None:
+            self.stop_live_import(restore=True)
         if hasattr(self, 'loading_dialog') and self.loading_dialog:
             self.loading_dialog.destroy()
     
@@ -1517,12 +5527,7 @@ class StrategyAnalyzer:
         self.update_calendar()
     
     def cache_trades_by_date(self):
-        self.trades_by_date = {}
-        for trade in self.trades:
-            date_key = trade['date'].strftime('%Y-%m-%d')
-            if date_key not in self.trades_by_date:
-                self.trades_by_date[date_key] = []
-            self.trades_by_date[date_key].append(trade)
+        self.trades_by_date = self.trades.group_by_date()
     
     def update_stats_display(self):
         if not self.stats:
@@ -1550,15 +5555,9 @@ class StrategyAnalyzer:
     
     def calculate_monthly_stats(self):
         """Calculate statistics for the currently displayed month"""
-        monthly_trades = []
-        monthly_pnl = 0.0
+        month_stats = self.range_stats(*self.displayed_month_range())
         
-        for trade in self.trades:
-            if trade['date'].year == self.current_year and trade['date'].month == self.current_month:
-                monthly_trades.append(trade)
-                monthly_pnl += trade['pnl']
-        
-        if not monthly_trades:
+        if not month_stats['total_trades']:
             return {
                 'monthly_pnl': 0.0,
                 'monthly_win_rate': 0.0,
@@ -1566,20 +5565,17 @@ class StrategyAnalyzer:
                 'monthly_trades': 0
             }
         
-        winning_trades = sum(1 for trade in monthly_trades if trade['pnl'] > 0)
-        monthly_win_rate = (winning_trades / len(monthly_trades) * 100) if monthly_trades else 0
-        
-        trading_days = set()
-        for trade in monthly_trades:
-            trading_days.add(trade['date'])
+        monthly_pnl = month_stats['net_pnl']
+        monthly_win_rate = month_stats['winning_trades'] / month_stats['total_trades'] * 100
         
-        monthly_avg_daily = monthly_pnl / len(trading_days) if trading_days else 0
+        trading_days = month_stats['trading_days']
+        monthly_avg_daily = monthly_pnl / trading_days if trading_days else 0
         
         return {
             'monthly_pnl': monthly_pnl,
             'monthly_win_rate': monthly_win_rate,
             'monthly_avg_daily': monthly_avg_daily,
-            'monthly_trades': len(monthly_trades)
+            'monthly_trades': month_stats['total_trades']
         }
     
     def show_detailed_stats(self):
@@ -1714,18 +5710,19 @@ class StrategyAnalyzer:
         scroll_frame = tk.Frame(parent, bg=self.theme['bg_dark'])
         scroll_frame.pack(fill='both', expand=True, padx=10, pady=10)
         
-        winning_trades = [t for t in self.trades if t['pnl'] > 0]
-        losing_trades = [t for t in self.trades if t['pnl'] < 0]
+        trade_stats = self.range_stats()
+        winning_trades = trade_stats['winning_trades']
+        losing_trades = trade_stats['losing_trades']
         
         if winning_trades:
-            avg_win = sum(t['pnl'] for t in winning_trades) / len(winning_trades)
-            max_win = max(t['pnl'] for t in winning_trades)
+            avg_win = trade_stats['gross_profit'] / winning_trades
+            max_win = trade_stats['largest_win']
         else:
             avg_win = max_win = 0
             
         if losing_trades:
-            avg_loss = sum(t['pnl'] for t in losing_trades) / len(losing_trades)
-            max_loss = min(t['pnl'] for t in losing_trades)
+            avg_loss = trade_stats['gross_loss'] / losing_trades
+            max_loss = trade_stats['largest_loss']
         else:
             avg_loss = max_loss = 0
         
@@ -1734,9 +5731,9 @@ class StrategyAnalyzer:
             ("Average Loss", f"${avg_loss:.2f}"),
             ("Largest Win", f"${max_win:.2f}"),
             ("Largest Loss", f"${max_loss:.2f}"),
-            ("Winning Trades", str(len(winning_trades))),
-            ("Losing Trades", str(len(losing_trades))),
-            ("Profit Factor", f"{(abs(avg_win * len(winning_trades)) / abs(avg_loss * len(losing_trades)) if losing_trades else 0):.2f}"),
+            ("Winning Trades", str(winning_trades)),
+            ("Losing Trades", str(losing_trades)),
+            ("Profit Factor", f"{(abs(trade_stats['gross_profit']) / abs(trade_stats['gross_loss']) if losing_trades else 0):.2f}"),
             ("Risk/Reward Ratio", f"{(abs(avg_win / avg_loss) if avg_loss != 0 else 0):.2f}")
         ]
         
@@ -1847,12 +5844,16 @@ class StrategyAnalyzer:
         month_data_start = time.time()
         month_pnl_data = {}
         month_trade_data = {}
+        month_count_data = {}
+        live_counts = self.live_import['trade_counts'] if self.live_import else None
+        daily_pnl, trades_by_date = self.month_view()
         for week in cal:
             for day in week:
                 if day != 0:
                     date_key = f"{self.current_year}-{self.current_month:02d}-{day:02d}"
-                    month_pnl_data[day] = self.daily_pnl.get(date_key, 0)
-                    month_trade_data[day] = self.trades_by_date.get(date_key, [])
+                    month_pnl_data[day] = daily_pnl.get(date_key, 0)
+                    month_trade_data[day] = trades_by_date.get(date_key, [])
+                    month_count_data[day] = live_counts.get(date_key, 0) if live_counts is not None else None
         month_data_time = time.time() - month_data_start
         
         cell_creation_start = time.time()
@@ -1867,7 +5868,7 @@ class StrategyAnalyzer:
                 pnl = month_pnl_data[day]
                 day_trades = month_trade_data[day]
                 
-                self.create_optimized_day_cell(day, pnl, day_trades, row, col)
+                self.create_optimized_day_cell(day, pnl, day_trades, row, col, month_count_data[day])
         cell_creation_time = time.time() - cell_creation_start
         
         month_name = calendar.month_name[self.current_month]